@@ -1,3 +1,4 @@
+import asyncio
 import json
 import os
 import logging
@@ -8,7 +9,7 @@ from unittest.mock import MagicMock
 import google.generativeai as genai
 from google.cloud import aiplatform
 from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel, validator
+from pydantic import BaseModel, field_validator
 from jinja2 import Environment, FileSystemLoader
 from bs4 import BeautifulSoup
 from slugify import slugify
@@ -41,6 +42,18 @@ if cloud_logging:
         logger.warning("Falling back to standard logging")
         logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO'))
 
+# Smart quotes and quote-like marks mapped to plain ASCII quotes
+QUOTES_TRANSLATION = str.maketrans({
+    '\u201c': '"',  # Left double quote
+    '\u201d': '"',  # Right double quote
+    '\u2018': "'",  # Left single quote
+    '\u2019': "'",  # Right single quote
+    '\u2032': "'",  # Prime
+    '\u201b': "'",  # Reversed single quote
+    '`': "'",       # Backtick
+    '\u00b4': "'"   # Acute accent
+})
+
 class ContentRequest(BaseModel):
     """Pydantic model for content generation request."""
     topic: Dict[str, Any]
@@ -49,14 +62,16 @@ class ContentRequest(BaseModel):
     style: Optional[str] = None
     keywords: Optional[List[str]] = None
 
-    @validator('format')
+    @field_validator('format')
+    @classmethod
     def validate_format(cls, v):
         valid_formats = ['article', 'blog_post', 'social_media']
         if v not in valid_formats:
             raise ValueError(f"Invalid content format. Must be one of: {valid_formats}")
         return v
 
-    @validator('topic')
+    @field_validator('topic')
+    @classmethod
     def validate_topic(cls, v):
         if not v.get('term'):
             raise ValueError("Topic term cannot be empty")
@@ -206,10 +221,9 @@ class ContentGenerationService:
         style: Optional[str] = None
     ) -> Dict[str, str]:
         """Generate content sections using Google AI services."""
-        sections = {}
         template_config = self.config['templates'][format]
         
-        for section in template_config['sections']:
+        async def generate_section(section: str) -> str:
             try:
                 # Create prompt for the section
                 prompt = self._create_prompt(
@@ -229,15 +243,18 @@ class ContentGenerationService:
                     section_content = response.text
                 
                 # Clean up the generated text
-                section_content = self._clean_content(section_content)
-                
-                sections[section] = section_content
+                return self._clean_content(section_content)
                 
             except Exception as e:
                 logger.error(f"Error generating section {section}: {str(e)}")
-                sections[section] = f"Error generating {section}"
+                return f"Error generating {section}"
         
-        return sections
+        # Sections are independent, so request them all at once; gather keeps template order
+        section_contents = await asyncio.gather(*[
+            generate_section(section) for section in template_config['sections']
+        ])
+        
+        return dict(zip(template_config['sections'], section_contents))
 
     async def _generate_with_gemini(self, prompt: str) -> Any:
         """Generate content using Gemini API."""
@@ -289,26 +306,8 @@ class ContentGenerationService:
 
     def _clean_content(self, content: str) -> str:
         """Clean and format the generated content."""
-        # Remove extra spaces
-        content = ' '.join(content.split())
-        
-        # Replace smart quotes with regular quotes
-        quotes_map = {
-            '"': '"',  # Left double quote
-            '"': '"',  # Right double quote
-            '"': '"',  # Straight double quote
-            ''': "'",  # Left single quote
-            ''': "'",  # Right single quote
-            '′': "'",  # Prime
-            '‛': "'",  # Reversed single quote
-            '`': "'",  # Backtick
-            '´': "'"   # Acute accent
-        }
-        
-        for smart_quote, regular_quote in quotes_map.items():
-            content = content.replace(smart_quote, regular_quote)
-        
-        return content
+        # Remove extra spaces, then replace smart quotes in a single pass
+        return ' '.join(content.split()).translate(QUOTES_TRANSLATION)
 
     async def publish_content(self, content: Dict[str, Any]) -> None:
         """Publish generated content to Pub/Sub."""
@@ -346,4 +345,4 @@ async def generate_content(request: ContentRequest):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8000, loop="uvloop") 
\ No newline at end of file
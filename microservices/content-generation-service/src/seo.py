@@ -1,8 +1,13 @@
 import re
-from typing import Dict, Any, List
+import functools
+from typing import Dict, Any, List, Optional, Tuple
 from nltk.tokenize import word_tokenize, sent_tokenize
 from nltk.corpus import stopwords
 import nltk
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
 
 class SEOOptimizer:
     def __init__(self, config: Dict[str, Any]):
@@ -12,7 +17,11 @@ class SEOOptimizer:
         nltk.download('punkt')
         nltk.download('stopwords')
         
-        self.stop_words = set(stopwords.words('english'))
+        self.stop_words = frozenset(stopwords.words('english'))
+        
+        # Keyword lists repeat across the density checks of one optimize() call
+        self._keyword_automaton = functools.lru_cache(maxsize=128)(self._build_keyword_automaton)
+        self._keyword_tokens = functools.lru_cache(maxsize=1024)(self._tokenize_keyword)
     
     async def optimize(self, content: str, keywords: List[str]) -> str:
         """Optimize content for SEO."""
@@ -41,21 +50,51 @@ class SEOOptimizer:
     def _calculate_keyword_density(self, content: str, keywords: List[str]) -> float:
         """Calculate keyword density in the content."""
         words = word_tokenize(content.lower())
-        total_words = len([w for w in words if w not in self.stop_words])
+        stop_words = self.stop_words
+        total_words = sum(1 for w in words if w not in stop_words)
         
         if total_words == 0:
             return 0
         
         keyword_count = 0
-        for keyword in keywords:
-            # Count occurrences of each keyword
-            keyword_tokens = word_tokenize(keyword.lower())
-            for i in range(len(words) - len(keyword_tokens) + 1):
-                if words[i:i + len(keyword_tokens)] == keyword_tokens:
-                    keyword_count += 1
+        if ahocorasick is not None:
+            # Scan all keywords in one pass; padding keeps matches on token boundaries
+            automaton = self._keyword_automaton(tuple(keywords))
+            if automaton is not None:
+                text = f" {' '.join(words)} "
+                keyword_count = sum(count for _, count in automaton.iter(text))
+        else:
+            # Each token gets its own padding so adjacent matches don't share a space
+            text = f" {'  '.join(words)} "
+            for keyword in keywords:
+                # Count occurrences of each keyword
+                keyword_tokens = self._keyword_tokens(keyword)
+                if keyword_tokens:
+                    keyword_count += text.count(f" {'  '.join(keyword_tokens)} ")
         
         return keyword_count / total_words
     
+    def _tokenize_keyword(self, keyword: str) -> Tuple[str, ...]:
+        """Tokenize a keyword; cached as _keyword_tokens since keywords recur across a content job."""
+        return tuple(word_tokenize(keyword.lower()))
+    
+    def _build_keyword_automaton(self, keywords: Tuple[str, ...]) -> Optional['ahocorasick.Automaton']:
+        """Build an Aho-Corasick automaton over the space-joined tokens of each keyword."""
+        automaton = ahocorasick.Automaton()
+        for keyword in keywords:
+            keyword_tokens = self._keyword_tokens(keyword)
+            if not keyword_tokens:
+                continue
+            needle = f" {' '.join(keyword_tokens)} "
+            # A keyword listed twice counts twice, as with the token-window scan
+            automaton.add_word(needle, automaton.get(needle, 0) + 1)
+        
+        if len(automaton) == 0:
+            return None
+        
+        automaton.make_automaton()
+        return automaton
+    
     def _increase_keyword_density(self, content: str, keywords: List[str]) -> str:
         """Increase keyword density by adding keywords naturally."""
         sentences = sent_tokenize(content)
@@ -178,6 +178,18 @@ async def test_optimize_content(content_generation_service, sample_request):
     assert len(optimized_content) > 0
     assert '<!-- meta-description' in optimized_content
 
+def test_calculate_keyword_density(content_generation_service):
+    """Test keyword density counts whole-token keyword matches."""
+    content = "Machine learning helps AI. AI learning differs from machine learning."
+    
+    density = content_generation_service.seo_optimizer._calculate_keyword_density(
+        content,
+        ['machine learning', 'AI']
+    )
+    
+    # 2 'machine learning' + 2 'ai' over 11 non-stopword tokens ('from' is a stopword)
+    assert density == pytest.approx(4 / 11)
+
 def test_clean_content(content_generation_service):
     """Test content cleaning."""
     test_content = '"Smart" quotes and \'apostrophes\' with  extra  spaces'
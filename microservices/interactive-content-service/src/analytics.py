@@ -1,7 +1,7 @@
 from typing import Dict, Any, List, Optional
 import logging
 from logging_config import get_logger
-import json
+import orjson
 from datetime import datetime, timedelta
 from google.cloud import bigquery
 from google.cloud import pubsub_v1
@@ -78,9 +78,9 @@ class AnalyticsTracker:
                 "user_id": user_id,
                 "element_id": data.get("element_id"),
                 "element_type": data.get("element_type"),
-                "interaction_data": json.dumps(data),
+                "interaction_data": orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS).decode(),
                 "session_id": session_id,
-                "client_info": json.dumps(self._get_client_info(data))
+                "client_info": orjson.dumps(self._get_client_info(data)).decode()
             }
 
             # Store event
@@ -130,7 +130,7 @@ class AnalyticsTracker:
                 'interactive-analytics-events'
             )
             
-            data = json.dumps(event).encode('utf-8')
+            data = orjson.dumps(event)
             future = self.publisher.publish(topic_path, data)
             await asyncio.wrap_future(future)
 
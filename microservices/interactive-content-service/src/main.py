@@ -169,7 +169,7 @@ class InteractiveContentService:
             elif element.type == "reactions":
                 processed = await self._process_reactions(element)
             else:
-                processed = element.dict()
+                processed = element.model_dump()
 
             processed_elements.append(processed)
 
@@ -264,23 +264,32 @@ class InteractiveContentService:
 # Initialize service
 service = InteractiveContentService()
 
+def get_service() -> InteractiveContentService:
+    """Provide the shared service instance to endpoints."""
+    return service
+
 @app.post("/generate")
 async def generate_interactive_content(
     request: InteractiveContentRequest,
-    background_tasks: BackgroundTasks
+    background_tasks: BackgroundTasks,
+    service: InteractiveContentService = Depends(get_service)
 ) -> Dict[str, Any]:
     """Generate interactive content endpoint."""
     return await service.generate_interactive_content(request)
 
 @app.websocket("/ws/{content_id}")
-async def websocket_endpoint(websocket: WebSocket, content_id: str):
+async def websocket_endpoint(
+    websocket: WebSocket,
+    content_id: str,
+    service: InteractiveContentService = Depends(get_service)
+):
     """WebSocket endpoint for real-time interactions."""
     await service.websocket_manager.connect(websocket, content_id)
     try:
         while True:
             data = await websocket.receive_json()
-            # Process real-time interaction
-            await service.websocket_manager.broadcast(content_id, data)
+            # Hand off to the content's broadcaster so slow consumers don't block receive
+            service.websocket_manager.enqueue_broadcast(content_id, data)
     except Exception as e:
         logger.error(f"WebSocket error: {str(e)}")
     finally:
@@ -54,7 +54,7 @@ class CommentElement(InteractiveElement):
     thread_id: str = Field(..., description="Unique identifier for comment thread")
     title: Optional[str] = None
     initial_comments: List[Dict[str, Any]] = Field(
-        default=[],
+        default_factory=list,
         description="Initial comments to populate the thread"
     )
     allow_replies: bool = Field(
@@ -1,16 +1,31 @@
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 import logging
 from logging_config import get_logger
 import json
 import aiohttp
-from datetime import datetime, timedelta
+from datetime import datetime
 import re
+import hashlib
 from google.cloud import language_v1
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+from cachetools import TTLCache
 
 logger = get_logger(__name__)
 
+# Simple spam detection heuristics, matched against lowercased content
+_SPAM_PATTERNS = tuple(re.compile(pattern) for pattern in [
+    r'\b(buy|sell|discount|offer|price|deal)\b',
+    r'https?://\S+',
+    r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
+    r'\b\d{1,4}-\d{1,4}-\d{1,4}\b'  # Phone number patterns
+])
+
+# Single-pass alternation of all spam patterns; clean content needs only this scan
+_SPAM_PREFILTER = re.compile('|'.join(f'(?:{pattern.pattern})' for pattern in _SPAM_PATTERNS))
+
+# Five or more repeats of the same character
+_REPEAT_RE = re.compile(r'(.)\1{4,}')
+
 class ContentModerator:
     """Handles content moderation and safety checks."""
     
@@ -22,11 +37,31 @@ class ContentModerator:
             config: Configuration dictionary for moderation settings
         """
         self.config = config
-        self.language_client = language_v1.LanguageServiceClient()
-        self.cache: Dict[str, Dict[str, Any]] = {}
-        self.executor = ThreadPoolExecutor(max_workers=4)
+        # The API client and semaphore bind to the event loop they are created on;
+        # build them on first use so they belong to the serving loop, not the import-time one
+        self._language_client: Optional[language_v1.LanguageServiceAsyncClient] = None
+        self._api_semaphore: Optional[asyncio.Semaphore] = None
+        self.cache: TTLCache = TTLCache(
+            maxsize=config.get("cache_max_size", 10000),
+            ttl=config["cache_duration"]
+        )
+        self._pending_sentiment: Dict[str, asyncio.Future] = {}
         logger.info("Content moderator initialized")
 
+    @property
+    def language_client(self) -> language_v1.LanguageServiceAsyncClient:
+        """Natural Language API client, created inside the running loop."""
+        if self._language_client is None:
+            self._language_client = language_v1.LanguageServiceAsyncClient()
+        return self._language_client
+
+    @property
+    def api_semaphore(self) -> asyncio.Semaphore:
+        """Limit on concurrent API calls, created inside the running loop."""
+        if self._api_semaphore is None:
+            self._api_semaphore = asyncio.Semaphore(self.config.get("max_concurrent_requests", 100))
+        return self._api_semaphore
+
     async def moderate_content(
         self,
         content: str,
@@ -46,7 +81,7 @@ class ContentModerator:
         """
         try:
             # Check cache first
-            cache_key = f"{content_type}:{hash(content)}"
+            cache_key = self._cache_key(content, content_type)
             cached_result = self._check_cache(cache_key)
             if cached_result:
                 logger.debug("Using cached moderation result")
@@ -62,9 +97,8 @@ class ContentModerator:
                 "metadata": metadata or {}
             }
 
-            # Run moderation checks
-            toxicity_score = await self._check_toxicity(content)
-            sentiment_score = await self._analyze_sentiment(content)
+            # Run moderation checks; toxicity and sentiment share one API call
+            toxicity_score, sentiment_score = await self._analyze_content(content)
             spam_score = await self._check_spam(content)
             
             result["scores"] = {
@@ -108,93 +142,63 @@ class ContentModerator:
                 "metadata": metadata or {}
             }
 
-    async def _check_toxicity(self, content: str) -> float:
-        """Check content toxicity using Cloud Natural Language API."""
-        try:
-            document = language_v1.Document(
-                content=content,
-                type_=language_v1.Document.Type.PLAIN_TEXT
-            )
-            
-            # Run in thread pool to avoid blocking
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                self.executor,
-                self._analyze_toxicity,
-                document
-            )
+    async def _analyze_content(self, content: str) -> Tuple[float, float]:
+        """
+        Get toxicity and sentiment scores from a single Natural Language API call.
+        
+        Concurrent requests for identical content share one in-flight call.
+        
+        Args:
+            content: The content to analyze
             
-            return result
-
-        except Exception as e:
-            logger.error(f"Error checking toxicity: {str(e)}")
-            return 0.0
-
-    def _analyze_toxicity(self, document: language_v1.Document) -> float:
-        """Analyze document toxicity (runs in thread pool)."""
-        try:
-            result = self.language_client.analyze_sentiment(
-                request={"document": document}
-            )
-            # Convert sentiment to toxicity score (inverse relationship)
-            return max(0.0, 1.0 - (result.document_sentiment.score + 1) / 2)
-        except Exception as e:
-            logger.error(f"Error in toxicity analysis: {str(e)}")
-            return 0.0
-
-    async def _analyze_sentiment(self, content: str) -> float:
-        """Analyze content sentiment."""
-        try:
+        Returns:
+            Tuple of (toxicity score, sentiment score)
+        """
+        future = self._pending_sentiment.get(content)
+        if future is None:
             document = language_v1.Document(
                 content=content,
                 type_=language_v1.Document.Type.PLAIN_TEXT
             )
-            
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                self.executor,
-                self._get_sentiment,
-                document
+            future = asyncio.ensure_future(self._get_sentiment(document))
+            self._pending_sentiment[content] = future
+            future.add_done_callback(
+                lambda _: self._pending_sentiment.pop(content, None)
             )
-            
-            return result
 
-        except Exception as e:
-            logger.error(f"Error analyzing sentiment: {str(e)}")
-            return 0.0
+        sentiment = await asyncio.shield(future)
+        if sentiment is None:
+            return 0.0, 0.0
 
-    def _get_sentiment(self, document: language_v1.Document) -> float:
-        """Get document sentiment (runs in thread pool)."""
+        # Convert sentiment to toxicity score (inverse relationship)
+        return max(0.0, 1.0 - (sentiment + 1) / 2), sentiment
+
+    async def _get_sentiment(self, document: language_v1.Document) -> Optional[float]:
+        """Get document sentiment from the Natural Language API."""
         try:
-            result = self.language_client.analyze_sentiment(
-                request={"document": document}
-            )
+            async with self.api_semaphore:
+                result = await self.language_client.analyze_sentiment(
+                    request={"document": document}
+                )
             return result.document_sentiment.score
         except Exception as e:
             logger.error(f"Error in sentiment analysis: {str(e)}")
-            return 0.0
+            return None
 
     async def _check_spam(self, content: str) -> float:
         """Check if content is likely spam."""
-        # Simple spam detection heuristics
-        spam_indicators = [
-            r'\b(buy|sell|discount|offer|price|deal)\b',
-            r'https?://\S+',
-            r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
-            r'\b\d{1,4}-\d{1,4}-\d{1,4}\b'  # Phone number patterns
-        ]
-        
-        spam_score = 0.0
         content_lower = content.lower()
-        
-        # Check for spam patterns
-        for pattern in spam_indicators:
-            matches = len(re.findall(pattern, content_lower))
-            if matches > 0:
-                spam_score += 0.2 * matches
-
-        # Check for repeated characters
-        if re.search(r'(.)\1{4,}', content):
+
+        # Check for spam patterns, counting per pattern only when any matched
+        spam_score = 0.0
+        if _SPAM_PREFILTER.search(content_lower):
+            spam_score = 0.2 * sum(
+                len(pattern.findall(content_lower))
+                for pattern in _SPAM_PATTERNS
+            )
+
+        # Check for repeated characters, unless the score is already capped
+        if spam_score < 1.0 and _REPEAT_RE.search(content):
             spam_score += 0.3
 
         # Normalize score
@@ -206,16 +210,18 @@ class ContentModerator:
         result: Dict[str, Any]
     ) -> None:
         """Apply comment-specific moderation rules."""
-        # Check for excessive formatting
-        if content.count('*') > 10 or content.count('_') > 10:
+        length = len(content)
+
+        # Check for excessive formatting (needs more than 10 characters)
+        if length > 10 and (content.count('*') > 10 or content.count('_') > 10):
             result["flags"].append("excessive_formatting")
 
         # Check for all caps
-        if len(content) > 20 and content.isupper():
+        if length > 20 and content.isupper():
             result["flags"].append("all_caps")
 
         # Check for comment length
-        if len(content) > self.config.get("max_length", 1000):
+        if length > self.config.get("max_length", 1000):
             result["flags"].append("too_long")
 
     async def _moderate_poll_option(
@@ -233,27 +239,19 @@ class ContentModerator:
         if content.lower() in self.cache.get("poll_options", set()):
             result["flags"].append("duplicate_option")
 
+    @staticmethod
+    def _cache_key(content: str, content_type: str) -> str:
+        """Build a stable, collision-resistant cache key for content."""
+        return hashlib.blake2b(
+            f"{content_type}\x00{content}".encode("utf-8", "surrogatepass"),
+            digest_size=16
+        ).hexdigest()
+
     def _check_cache(self, cache_key: str) -> Optional[Dict[str, Any]]:
         """Check if content moderation result is cached."""
-        if cache_key in self.cache:
-            cached = self.cache[cache_key]
-            if datetime.fromisoformat(cached["timestamp"]) + timedelta(
-                seconds=self.config["cache_duration"]
-            ) > datetime.utcnow():
-                return cached
-            else:
-                del self.cache[cache_key]
-        return None
+        # TTLCache expires entries on access
+        return self.cache.get(cache_key)
 
     def _cache_result(self, cache_key: str, result: Dict[str, Any]) -> None:
         """Cache moderation result."""
         self.cache[cache_key] = result
-        
-        # Clean up old cache entries
-        current_time = datetime.utcnow()
-        self.cache = {
-            k: v for k, v in self.cache.items()
-            if datetime.fromisoformat(v["timestamp"]) + timedelta(
-                seconds=self.config["cache_duration"]
-            ) > current_time
-        } 
\ No newline at end of file
@@ -1,18 +1,38 @@
-from typing import Dict, Set, Any
+from typing import Dict, List, Set, Any, NamedTuple
 from fastapi import WebSocket
-import json
+import asyncio
+import time
+import orjson
 import logging
+from datetime import datetime
 from logging_config import get_logger
 
 logger = get_logger(__name__)
 
+# Upper bound on pending outbound messages per content ID
+MAX_OUTBOUND_QUEUE_SIZE = 1024
+
+def encode_message(message: Dict[str, Any]) -> str:
+    """Encode a message as a JSON text frame."""
+    return orjson.dumps(message).decode()
+
+class ConnectionMetadata(NamedTuple):
+    """Per-connection bookkeeping for an active WebSocket."""
+    content_id: str
+    connected_at: float  # Unix epoch seconds
+    client_info: str
+
 class WebSocketManager:
     """Manages WebSocket connections and broadcasts for interactive content."""
     
     def __init__(self):
         """Initialize the WebSocket manager."""
-        self.active_connections: Dict[str, Set[WebSocket]] = {}
-        self.connection_metadata: Dict[WebSocket, Dict[str, Any]] = {}
+        self.active_connections: Dict[str, List[WebSocket]] = {}
+        self.connection_metadata: Dict[WebSocket, ConnectionMetadata] = {}
+        self.outbound_queues: Dict[str, asyncio.Queue] = {}
+        self.broadcast_tasks: Dict[str, asyncio.Task] = {}
+        self.dropped_messages = 0
+        self._total_connections = 0
         logger.info("WebSocket manager initialized")
 
     async def connect(self, websocket: WebSocket, content_id: str) -> None:
@@ -27,28 +47,30 @@ class WebSocketManager:
             # Accept the connection
             await websocket.accept()
             
-            # Initialize content_id set if it doesn't exist
+            # Initialize content_id list and its broadcaster if they don't exist
             if content_id not in self.active_connections:
-                self.active_connections[content_id] = set()
+                self.active_connections[content_id] = []
+                self._start_broadcaster(content_id)
             
-            # Add the connection to the set
-            self.active_connections[content_id].add(websocket)
+            # Add the connection to the list
+            self.active_connections[content_id].append(websocket)
+            self._total_connections += 1
             
             # Store metadata about the connection
-            self.connection_metadata[websocket] = {
-                "content_id": content_id,
-                "connected_at": datetime.utcnow().isoformat(),
-                "client_info": websocket.client.host
-            }
+            self.connection_metadata[websocket] = ConnectionMetadata(
+                content_id=content_id,
+                connected_at=time.time(),
+                client_info=websocket.client.host
+            )
             
             logger.info(f"New WebSocket connection for content {content_id}")
             
             # Send connection confirmation
-            await websocket.send_json({
+            await websocket.send_text(encode_message({
                 "type": "connection_established",
                 "content_id": content_id,
                 "message": "Successfully connected to interactive content"
-            })
+            }))
             
         except Exception as e:
             logger.error(f"Error establishing WebSocket connection: {str(e)}")
@@ -63,13 +85,15 @@ class WebSocketManager:
             content_id: The ID of the content the client was interacting with
         """
         try:
-            # Remove the connection from the set
+            # Remove the connection from the list
             if content_id in self.active_connections:
                 self.active_connections[content_id].remove(websocket)
+                self._total_connections -= 1
                 
                 # If no more connections for this content, clean up
                 if not self.active_connections[content_id]:
                     del self.active_connections[content_id]
+                    self._stop_broadcaster(content_id)
             
             # Clean up metadata
             if websocket in self.connection_metadata:
@@ -80,6 +104,54 @@ class WebSocketManager:
         except Exception as e:
             logger.error(f"Error during WebSocket disconnection: {str(e)}")
 
+    def _start_broadcaster(self, content_id: str) -> None:
+        """Create the outbound queue and broadcaster task for a content ID."""
+        self.outbound_queues[content_id] = asyncio.Queue(maxsize=MAX_OUTBOUND_QUEUE_SIZE)
+        self.broadcast_tasks[content_id] = asyncio.create_task(
+            self._broadcast_worker(content_id)
+        )
+
+    def _stop_broadcaster(self, content_id: str) -> None:
+        """Cancel the broadcaster task and drop the queue for a content ID."""
+        self.outbound_queues.pop(content_id, None)
+        task = self.broadcast_tasks.pop(content_id, None)
+        if task is not None:
+            task.cancel()
+
+    async def _broadcast_worker(self, content_id: str) -> None:
+        """Drain the outbound queue for a content ID and fan messages out."""
+        queue = self.outbound_queues[content_id]
+        while True:
+            message = await queue.get()
+            try:
+                await self.broadcast(content_id, message)
+            except Exception as e:
+                logger.error(f"Error in broadcaster for content {content_id}: {str(e)}")
+
+    def enqueue_broadcast(self, content_id: str, message: Dict[str, Any]) -> None:
+        """
+        Queue a message for broadcast without waiting on slow consumers.
+        
+        When the queue is full the oldest pending message is dropped so
+        memory stays bounded.
+        
+        Args:
+            content_id: The ID of the content to broadcast to
+            message: The message to broadcast
+        """
+        queue = self.outbound_queues.get(content_id)
+        if queue is None:
+            logger.warning(f"No active connections for content {content_id}")
+            return
+
+        try:
+            queue.put_nowait(message)
+        except asyncio.QueueFull:
+            queue.get_nowait()
+            self.dropped_messages += 1
+            logger.warning(f"Outbound queue full for content {content_id}, dropped oldest message")
+            queue.put_nowait(message)
+
     async def broadcast(self, content_id: str, message: Dict[str, Any]) -> None:
         """
         Broadcast a message to all connected clients for a specific content ID.
@@ -91,23 +163,50 @@ class WebSocketManager:
         if content_id not in self.active_connections:
             logger.warning(f"No active connections for content {content_id}")
             return
-            
-        disconnected = set()
         
-        # Add timestamp to message
+        # Add timestamp to message; taken once for every recipient of the broadcast
         message["timestamp"] = datetime.utcnow().isoformat()
         
-        # Broadcast to all connected clients
-        for connection in self.active_connections[content_id]:
-            try:
-                await connection.send_json(message)
-            except Exception as e:
-                logger.error(f"Error broadcasting message: {str(e)}")
-                disconnected.add(connection)
+        # Encode once and broadcast to all connected clients concurrently
+        payload = encode_message(message)
+        connections = list(self.active_connections[content_id])
+        results = await asyncio.gather(
+            *(connection.send_text(payload) for connection in connections),
+            return_exceptions=True
+        )
+        failures = [
+            (connection, result)
+            for connection, result in zip(connections, results)
+            if isinstance(result, Exception)
+        ]
         
         # Clean up any disconnected clients
-        for connection in disconnected:
-            await self.disconnect(connection, content_id)
+        if failures:
+            logger.error(
+                f"Error broadcasting message to {len(failures)} clients "
+                f"for content {content_id}: {str(failures[0][1])}"
+            )
+            self._remove_connections(content_id, {connection for connection, _ in failures})
+
+    def _remove_connections(self, content_id: str, websockets: Set[WebSocket]) -> None:
+        """Remove several failed connections for a content ID in one pass."""
+        connections = self.active_connections.get(content_id, [])
+        remaining = [
+            connection
+            for connection in connections
+            if connection not in websockets
+        ]
+        self._total_connections -= len(connections) - len(remaining)
+        for websocket in websockets:
+            self.connection_metadata.pop(websocket, None)
+
+        if remaining:
+            self.active_connections[content_id] = remaining
+        elif content_id in self.active_connections:
+            del self.active_connections[content_id]
+            self._stop_broadcaster(content_id)
+
+        logger.info(f"Removed {len(websockets)} disconnected WebSocket clients for content {content_id}")
 
     async def send_personal_message(
         self,
@@ -124,14 +223,14 @@ class WebSocketManager:
         try:
             # Add timestamp to message
             message["timestamp"] = datetime.utcnow().isoformat()
-            await websocket.send_json(message)
+            await websocket.send_text(encode_message(message))
             
         except Exception as e:
             logger.error(f"Error sending personal message: {str(e)}")
             # If sending fails, assume connection is dead
-            content_id = self.connection_metadata.get(websocket, {}).get("content_id")
-            if content_id:
-                await self.disconnect(websocket, content_id)
+            metadata = self.connection_metadata.get(websocket)
+            if metadata:
+                await self.disconnect(websocket, metadata.content_id)
 
     async def get_connection_info(self, content_id: str) -> Dict[str, Any]:
         """
@@ -156,8 +255,10 @@ class WebSocketManager:
             "active_connections": len(connections),
             "clients": [
                 {
-                    "client_host": self.connection_metadata[conn]["client_info"],
-                    "connected_at": self.connection_metadata[conn]["connected_at"]
+                    "client_host": self.connection_metadata[conn].client_info,
+                    "connected_at": datetime.utcfromtimestamp(
+                        self.connection_metadata[conn].connected_at
+                    ).isoformat()
                 }
                 for conn in connections
             ]
@@ -170,4 +271,4 @@ class WebSocketManager:
         Returns:
             Total number of active connections across all content IDs
         """
-        return sum(len(connections) for connections in self.active_connections.values()) 
\ No newline at end of file
+        return self._total_connections 
\ No newline at end of file
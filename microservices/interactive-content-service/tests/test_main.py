@@ -1,10 +1,13 @@
 import pytest
+import pytest_asyncio
+import asyncio
+import httpx
 from fastapi.testclient import TestClient
 from unittest.mock import patch, MagicMock
 import json
 import os
 from datetime import datetime, timedelta
-from src.main import app
+from src.main import app, get_service
 from src.models import (
     InteractiveElement,
     PollElement,
@@ -12,10 +15,27 @@ from src.models import (
     CommentElement
 )
 
-# Create test client
-client = TestClient(app)
+@pytest.fixture(scope="session")
+def event_loop():
+    """Share one event loop across the session for session-scoped async fixtures."""
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
 
-@pytest.fixture
+@pytest.fixture(scope="session")
+def client():
+    """Create a test client shared across the session, used for WebSocket tests."""
+    with TestClient(app) as test_client:
+        yield test_client
+
+@pytest_asyncio.fixture(scope="session")
+async def aclient():
+    """Create an async HTTP client that calls the app in-process over ASGI."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+        yield async_client
+
+@pytest.fixture(scope="session")
 def mock_config():
     """Fixture for mock configuration."""
     return {
@@ -51,6 +71,12 @@ def mock_config():
                 "threading_depth": 3
             }
         },
+        "templates": {
+            "article": {
+                "sections": ["header", "content", "interactive", "footer"],
+                "allowed_elements": ["polls", "quizzes", "comments", "reactions"]
+            }
+        },
         "moderation": {
             "enabled": True,
             "auto_moderation": True,
@@ -71,27 +97,36 @@ def mock_config():
         }
     }
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_service(mock_config):
-    """Fixture for mocked service with dependencies."""
-    with patch('src.main.InteractiveContentService._load_config') as mock_load_config:
-        mock_load_config.return_value = mock_config
-        with patch('src.main.InteractiveContentService._initialize_clients'):
-            from src.main import InteractiveContentService
-            service = InteractiveContentService()
-            yield service
+    """Fixture for a service with mocked config and clients, built once per session."""
+    def load_config(self):
+        self.config = mock_config
+        return mock_config
+
+    with patch('src.main.InteractiveContentService._load_config', load_config), \
+         patch('src.main.InteractiveContentService._initialize_clients'):
+        from src.main import InteractiveContentService
+        yield InteractiveContentService()
+
+@pytest.fixture(scope="session", autouse=True)
+def override_service(mock_service):
+    """Route endpoints to the mocked service instead of the module-level one."""
+    app.dependency_overrides[get_service] = lambda: mock_service
+    yield
+    app.dependency_overrides.clear()
 
 @pytest.mark.asyncio
-async def test_health_check():
+async def test_health_check(aclient):
     """Test health check endpoint."""
-    response = client.get("/health")
+    response = await aclient.get("/health")
     assert response.status_code == 200
     data = response.json()
     assert data["status"] == "healthy"
     assert "timestamp" in data
 
 @pytest.mark.asyncio
-async def test_generate_interactive_content(mock_service):
+async def test_generate_interactive_content(mock_service, aclient):
     """Test interactive content generation."""
     request_data = {
         "content_id": "test-content-123",
@@ -115,7 +150,7 @@ async def test_generate_interactive_content(mock_service):
         }
     }
 
-    with patch('src.main.service.generate_interactive_content') as mock_generate:
+    with patch.object(mock_service, 'generate_interactive_content') as mock_generate:
         mock_generate.return_value = {
             "content_id": request_data["content_id"],
             "url": f"https://storage.googleapis.com/test-bucket/test-interactive/{request_data['content_id']}.json",
@@ -124,7 +159,7 @@ async def test_generate_interactive_content(mock_service):
             "metadata": request_data["metadata"]
         }
 
-        response = client.post("/generate", json=request_data)
+        response = await aclient.post("/generate", json=request_data)
         assert response.status_code == 200
         data = response.json()
         assert data["content_id"] == request_data["content_id"]
@@ -133,7 +168,7 @@ async def test_generate_interactive_content(mock_service):
         assert data["elements_count"] == 1
 
 @pytest.mark.asyncio
-async def test_invalid_content_type(mock_service):
+async def test_invalid_content_type(mock_service, aclient):
     """Test handling of invalid content type."""
     request_data = {
         "content_id": "test-content-123",
@@ -145,14 +180,13 @@ async def test_invalid_content_type(mock_service):
         "interactive_elements": []
     }
 
-    response = client.post("/generate", json=request_data)
+    response = await aclient.post("/generate", json=request_data)
     assert response.status_code == 500
-    data = response.json()
-    assert "detail" in data
-    assert "invalid_type" in data["detail"]
+    assert b'"detail"' in response.content
+    assert b"invalid_type" in response.content
 
 @pytest.mark.asyncio
-async def test_poll_validation(mock_service):
+async def test_poll_validation(mock_service, aclient):
     """Test poll element validation."""
     request_data = {
         "content_id": "test-content-123",
@@ -172,14 +206,13 @@ async def test_poll_validation(mock_service):
         ]
     }
 
-    response = client.post("/generate", json=request_data)
+    response = await aclient.post("/generate", json=request_data)
     assert response.status_code == 500
-    data = response.json()
-    assert "detail" in data
-    assert "options" in data["detail"]
+    assert b'"detail"' in response.content
+    assert b"options" in response.content
 
 @pytest.mark.asyncio
-async def test_moderation(mock_service):
+async def test_moderation(mock_service, aclient):
     """Test content moderation."""
     request_data = {
         "content_id": "test-content-123",
@@ -214,13 +247,13 @@ async def test_moderation(mock_service):
             }
         }
 
-        response = client.post("/generate", json=request_data)
+        response = await aclient.post("/generate", json=request_data)
         assert response.status_code == 200
         data = response.json()
         assert data["content_id"] == request_data["content_id"]
 
 @pytest.mark.asyncio
-async def test_analytics_tracking(mock_service):
+async def test_analytics_tracking(mock_service, aclient):
     """Test analytics event tracking."""
     with patch('src.analytics.AnalyticsTracker.track_event') as mock_track:
         request_data = {
@@ -240,7 +273,7 @@ async def test_analytics_tracking(mock_service):
             ]
         }
 
-        response = client.post("/generate", json=request_data)
+        response = await aclient.post("/generate", json=request_data)
         assert response.status_code == 200
         mock_track.assert_called_once()
         call_args = mock_track.call_args[0]
@@ -248,7 +281,7 @@ async def test_analytics_tracking(mock_service):
         assert call_args[1]["content_id"] == request_data["content_id"]
 
 @pytest.mark.asyncio
-async def test_websocket_connection():
+async def test_websocket_connection(client):
     """Test WebSocket connection and messaging."""
     content_id = "test-content-123"
     with client.websocket_connect(f"/ws/{content_id}") as websocket:
@@ -257,22 +290,36 @@ async def test_websocket_connection():
         assert data["type"] == "connection_established"
         assert data["content_id"] == content_id
 
-        # Test message broadcast
-        test_message = {
-            "type": "reaction",
-            "content_id": content_id,
-            "data": {"reaction": "like"}
-        }
-        websocket.send_json(test_message)
-        
-        # Should receive the same message back (broadcast)
-        response = websocket.receive_json()
-        assert response["type"] == test_message["type"]
-        assert response["content_id"] == test_message["content_id"]
-        assert "timestamp" in response
+        # Test message broadcast, sending and receiving concurrently
+        test_messages = [
+            {
+                "type": "reaction",
+                "content_id": content_id,
+                "data": {"reaction": "like", "seq": seq}
+            }
+            for seq in range(5)
+        ]
+
+        def send_all():
+            for message in test_messages:
+                websocket.send_json(message)
+
+        def receive_all():
+            return [websocket.receive_json() for _ in test_messages]
+
+        # Should receive every message back (broadcast), in order
+        _, responses = await asyncio.gather(
+            asyncio.to_thread(send_all),
+            asyncio.to_thread(receive_all)
+        )
+        for message, response in zip(test_messages, responses):
+            assert response["type"] == message["type"]
+            assert response["content_id"] == message["content_id"]
+            assert response["data"]["seq"] == message["data"]["seq"]
+            assert "timestamp" in response
 
 @pytest.mark.asyncio
-async def test_error_handling():
+async def test_error_handling(aclient):
     """Test error handling and responses."""
     # Test missing required fields
     request_data = {
@@ -283,17 +330,18 @@ async def test_error_handling():
         "interactive_elements": []
     }
 
-    response = client.post("/generate", json=request_data)
-    assert response.status_code == 422  # Validation error
-    data = response.json()
-    assert "detail" in data
-
-    # Test invalid JSON
-    response = client.post(
-        "/generate",
-        data="invalid json",
-        headers={"Content-Type": "application/json"}
+    # Send the missing-field and invalid JSON requests concurrently
+    missing_field, invalid_json = await asyncio.gather(
+        aclient.post("/generate", json=request_data),
+        aclient.post(
+            "/generate",
+            content="invalid json",
+            headers={"Content-Type": "application/json"}
+        )
     )
-    assert response.status_code == 422
-    data = response.json()
-    assert "detail" in data 
\ No newline at end of file
+
+    assert missing_field.status_code == 422  # Validation error
+    assert b'"detail"' in missing_field.content
+
+    assert invalid_json.status_code == 422
+    assert b'"detail"' in invalid_json.content
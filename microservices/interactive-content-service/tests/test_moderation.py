@@ -1 +1,96 @@
- 
\ No newline at end of file
+import pytest
+from unittest.mock import patch, AsyncMock
+from src.moderation import ContentModerator
+
+@pytest.fixture
+def mock_config():
+    """Fixture for mock moderation configuration."""
+    return {
+        "enabled": True,
+        "auto_moderation": True,
+        "toxicity_threshold": 0.8,
+        "spam_threshold": 0.9,
+        "cache_duration": 3600
+    }
+
+@pytest.fixture
+def moderator(mock_config):
+    """Fixture for content moderator instance."""
+    with patch('google.cloud.language_v1.LanguageServiceAsyncClient'):
+        yield ContentModerator(mock_config)
+
+@pytest.mark.asyncio
+async def test_check_spam_clean_content(moderator):
+    """Test clean content scores zero."""
+    assert await moderator._check_spam("Great article, thanks for sharing") == 0.0
+
+@pytest.mark.asyncio
+async def test_check_spam_patterns(moderator):
+    """Test each spam pattern match adds to the score."""
+    score = await moderator._check_spam("BUY now at https://example.com")
+    assert score == pytest.approx(0.4)
+
+@pytest.mark.asyncio
+async def test_check_spam_repeated_characters(moderator):
+    """Test repeated characters are penalized and the score is capped."""
+    assert await moderator._check_spam("wowwwww") == pytest.approx(0.3)
+    assert await moderator._check_spam("deal deal deal deal deal deal!!!!!") == 1.0
+
+def test_cache_round_trip(moderator):
+    """Test cached results are returned until they expire."""
+    result = {"is_safe": True, "flags": []}
+    moderator._cache_result("text:abc", result)
+    assert moderator._check_cache("text:abc") == result
+    assert moderator._check_cache("text:missing") is None
+
+def test_cache_is_bounded(mock_config):
+    """Test the cache evicts entries beyond its maximum size."""
+    mock_config["cache_max_size"] = 2
+    with patch('google.cloud.language_v1.LanguageServiceAsyncClient'):
+        moderator = ContentModerator(mock_config)
+    for i in range(3):
+        moderator._cache_result(f"text:{i}", {"is_safe": True})
+    assert len(moderator.cache) == 2
+
+@pytest.mark.asyncio
+async def test_moderate_content_single_api_call(moderator):
+    """Test toxicity and sentiment are derived from one sentiment request."""
+    moderator.language_client.analyze_sentiment = AsyncMock()
+    moderator.language_client.analyze_sentiment.return_value.document_sentiment.score = 0.5
+
+    result = await moderator.moderate_content("A perfectly friendly comment")
+
+    moderator.language_client.analyze_sentiment.assert_awaited_once()
+    assert result["scores"]["sentiment"] == 0.5
+    assert result["scores"]["toxicity"] == pytest.approx(0.25)
+    assert result["is_safe"]
+
+def test_cache_key_is_stable_and_type_scoped():
+    """Test cache keys are deterministic and distinguish content types."""
+    key = ContentModerator._cache_key("hello", "comment")
+    assert key == ContentModerator._cache_key("hello", "comment")
+    assert key != ContentModerator._cache_key("hello", "poll_option")
+
+@pytest.mark.asyncio
+async def test_moderate_comment_flags(moderator):
+    """Test comment-specific formatting and casing flags."""
+    result = {"flags": []}
+    await moderator._moderate_comment("THIS IS A VERY LOUD COMMENT " + "*" * 11, result)
+    assert "excessive_formatting" in result["flags"]
+    assert "all_caps" in result["flags"]
+
+    result = {"flags": []}
+    await moderator._moderate_comment("**ok**", result)
+    assert result["flags"] == []
+
+@pytest.mark.asyncio
+async def test_api_clients_created_on_first_use(mock_config):
+    """Test the API client and semaphore are built inside the running loop, not at init."""
+    with patch('google.cloud.language_v1.LanguageServiceAsyncClient') as client_cls:
+        moderator = ContentModerator(mock_config)
+        client_cls.assert_not_called()
+        assert moderator._api_semaphore is None
+
+        assert moderator.language_client is client_cls.return_value
+        assert moderator.api_semaphore is moderator.api_semaphore
+        client_cls.assert_called_once()
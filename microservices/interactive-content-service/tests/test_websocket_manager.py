@@ -1 +1,105 @@
- 
\ No newline at end of file
+import pytest
+import asyncio
+import json
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+from src.websocket_manager import WebSocketManager
+
+def make_websocket():
+    """Create a mock WebSocket connection."""
+    websocket = MagicMock()
+    websocket.accept = AsyncMock()
+    websocket.send_text = AsyncMock()
+    websocket.client.host = "127.0.0.1"
+    return websocket
+
+@pytest.mark.asyncio
+async def test_enqueue_broadcast_delivers_to_connections():
+    """Test queued messages are fanned out by the broadcaster task."""
+    manager = WebSocketManager()
+    websocket = make_websocket()
+    await manager.connect(websocket, "content-1")
+
+    manager.enqueue_broadcast("content-1", {"type": "reaction"})
+    await asyncio.sleep(0.01)
+
+    sent = json.loads(websocket.send_text.call_args[0][0])
+    assert sent["type"] == "reaction"
+    assert "timestamp" in sent
+
+    await manager.disconnect(websocket, "content-1")
+    assert "content-1" not in manager.broadcast_tasks
+    assert "content-1" not in manager.outbound_queues
+
+@pytest.mark.asyncio
+async def test_enqueue_broadcast_drops_oldest_when_full():
+    """Test a full outbound queue drops the oldest message."""
+    manager = WebSocketManager()
+    manager.outbound_queues["content-1"] = asyncio.Queue(maxsize=2)
+
+    manager.enqueue_broadcast("content-1", {"seq": 1})
+    manager.enqueue_broadcast("content-1", {"seq": 2})
+    manager.enqueue_broadcast("content-1", {"seq": 3})
+
+    queue = manager.outbound_queues["content-1"]
+    assert manager.dropped_messages == 1
+    assert queue.get_nowait()["seq"] == 2
+    assert queue.get_nowait()["seq"] == 3
+
+@pytest.mark.asyncio
+async def test_broadcast_disconnects_failed_connections():
+    """Test connections that fail to receive are removed."""
+    manager = WebSocketManager()
+    healthy = make_websocket()
+    broken = make_websocket()
+    await manager.connect(healthy, "content-1")
+    await manager.connect(broken, "content-1")
+    broken.send_text.side_effect = RuntimeError("closed")
+
+    await manager.broadcast("content-1", {"type": "reaction"})
+
+    assert manager.active_connections["content-1"] == [healthy]
+    assert broken not in manager.connection_metadata
+
+@pytest.mark.asyncio
+async def test_send_personal_message_encodes_text_frame():
+    """Test personal messages are sent as JSON text with a timestamp."""
+    manager = WebSocketManager()
+    websocket = make_websocket()
+
+    await manager.send_personal_message(websocket, {"type": "ack"})
+
+    sent = json.loads(websocket.send_text.call_args[0][0])
+    assert sent["type"] == "ack"
+    assert "timestamp" in sent
+
+@pytest.mark.asyncio
+async def test_get_connection_info():
+    """Test connection info reports hosts and ISO connection times."""
+    manager = WebSocketManager()
+    websocket = make_websocket()
+    await manager.connect(websocket, "content-1")
+
+    info = await manager.get_connection_info("content-1")
+
+    assert info["active_connections"] == 1
+    assert info["clients"][0]["client_host"] == "127.0.0.1"
+    assert datetime.fromisoformat(info["clients"][0]["connected_at"])
+
+@pytest.mark.asyncio
+async def test_get_total_connections_tracks_changes():
+    """Test the running connection count follows connects and removals."""
+    manager = WebSocketManager()
+    first = make_websocket()
+    second = make_websocket()
+    await manager.connect(first, "content-1")
+    await manager.connect(second, "content-2")
+    assert manager.get_total_connections() == 2
+
+    await manager.disconnect(first, "content-1")
+    await manager.disconnect(first, "content-1")
+    assert manager.get_total_connections() == 1
+
+    second.send_text.side_effect = RuntimeError("closed")
+    await manager.broadcast("content-2", {"type": "reaction"})
+    assert manager.get_total_connections() == 0
@@ -1,15 +1,21 @@
+import bisect
 import json
 import os
+import re
 import logging
-from typing import List, Dict, Any
+from concurrent import futures
+from typing import List, Dict, Any, Iterator
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 
+import numpy as np
+import orjson
 import pandas as pd
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Response
 from pydantic import BaseModel
 import nltk
-from nltk.tokenize import word_tokenize
 from nltk.corpus import stopwords
+from nltk.tag import PerceptronTagger
 from sklearn.feature_extraction.text import TfidfVectorizer
 from dotenv import load_dotenv
 from google.cloud import pubsub_v1, language_v1, videointelligence_v1
@@ -32,15 +38,47 @@ if cloud_logging:
     logging_client = cloud_logging.Client()
     logger = logging_client.logger("topic-discovery-service")
 
-# Download required NLTK data
-nltk.download('punkt')
-nltk.download('stopwords')
-nltk.download('averaged_perceptron_tagger')
+# Word tokens, keeping inner apostrophes (e.g. "don't")
+TOKEN_PATTERN = re.compile(r"\w+(?:'\w+)*")
+
+# Topic category by two-letter Penn Treebank POS tag prefix
+POS_CATEGORIES = {
+    'NN': 'entity',
+    'VB': 'action',
+    'JJ': 'attribute'
+}
+
+# Maximum number of keywords Pytrends accepts in one payload
+PYTRENDS_MAX_KEYWORDS = 5
+
+# Trend metadata comes from pandas, so allow non-string keys and numpy values
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+@dataclass
+class Topic:
+    """A discovered topic or trend; serialized natively by orjson."""
+    __slots__ = ('term', 'score', 'timestamp', 'metadata')
+
+    term: str
+    score: float
+    timestamp: str
+    metadata: Dict[str, Any]
+
+# Download required NLTK data only when it isn't already installed
+for resource_path, package in [
+    ('corpora/stopwords', 'stopwords'),
+    ('taggers/averaged_perceptron_tagger', 'averaged_perceptron_tagger')
+]:
+    try:
+        nltk.data.find(resource_path)
+    except LookupError:
+        nltk.download(package, quiet=True)
 
 class TopicDiscoveryService:
     def __init__(self):
         self.config = self._load_config()
         self.publisher = pubsub_v1.PublisherClient()
+        self._pending_publishes = set()
         self.language_client = language_v1.LanguageServiceClient()
         self.video_client = videointelligence_v1.VideoIntelligenceServiceClient()
         
@@ -56,6 +94,14 @@ class TopicDiscoveryService:
             max_df=self.config['nlp']['max_document_frequency'],
             stop_words=self.config['nlp']['stop_words']
         )
+        
+        # Preprocessing lookups reused across requests
+        self.stop_words = frozenset(stopwords.words('english'))
+        self.min_token_length = self.config['nlp']['min_token_length']
+        self.max_token_length = self.config['nlp']['max_token_length']
+        
+        # Load the POS tagger model once instead of per nltk.pos_tag call
+        self.tagger = PerceptronTagger()
 
     def _load_config(self) -> Dict[str, Any]:
         """Load configuration from JSON file."""
@@ -66,14 +112,11 @@ class TopicDiscoveryService:
         with open(config_path, 'r') as f:
             return json.load(f)
 
-    async def process_raw_data(self, data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    async def process_raw_data(self, data: Dict[str, Any]) -> List[Topic]:
         """Process incoming raw data to identify topics."""
         try:
-            # Extract text content from the data
-            texts = self._extract_text_content(data)
-            
-            # Perform text preprocessing
-            processed_texts = self._preprocess_texts(texts)
+            # Extract and preprocess text content in a single pass
+            processed_texts = self._extract_and_preprocess(data)
             
             # Extract topics using TF-IDF
             topics = self._extract_topics(processed_texts)
@@ -86,42 +129,32 @@ class TopicDiscoveryService:
             logger.error(f"Error processing raw data: {str(e)}")
             raise
 
-    def _extract_text_content(self, data: Dict[str, Any]) -> List[str]:
-        """Extract text content from various data sources."""
-        texts = []
-        
-        if 'social_media' in data:
-            for post in data['social_media']:
-                if post.get('text'):
-                    texts.append(post['text'])
-        
-        if 'search_queries' in data:
-            texts.extend(data['search_queries'])
-        
-        return texts
+    def _extract_and_preprocess(self, data: Dict[str, Any]) -> List[str]:
+        """Extract and preprocess text content, one text at a time."""
+        return [self._preprocess_text(text) for text in self._iter_text_content(data)]
 
-    def _preprocess_texts(self, texts: List[str]) -> List[str]:
-        """Preprocess text data."""
-        processed_texts = []
-        stop_words = set(stopwords.words('english'))
+    def _iter_text_content(self, data: Dict[str, Any]) -> Iterator[str]:
+        """Yield text content from various data sources; missing sources are skipped."""
+        for post in data.get('social_media') or []:
+            if post.get('text'):
+                yield post['text']
         
-        for text in texts:
-            # Tokenize
-            tokens = word_tokenize(text.lower())
-            
-            # Filter tokens
-            filtered_tokens = [
-                token for token in tokens
-                if (len(token) >= self.config['nlp']['min_token_length'] and
-                    len(token) <= self.config['nlp']['max_token_length'] and
-                    token not in stop_words)
-            ]
-            
-            processed_texts.append(' '.join(filtered_tokens))
+        yield from data.get('search_queries') or []
+
+    def _preprocess_text(self, text: str) -> str:
+        """Tokenize a text and drop stop words and out-of-range tokens."""
+        stop_words = self.stop_words
+        min_length = self.min_token_length
+        max_length = self.max_token_length
         
-        return processed_texts
+        # Tokenize and filter tokens
+        return ' '.join(
+            token for token in TOKEN_PATTERN.findall(text.lower())
+            if (min_length <= len(token) <= max_length and
+                token not in stop_words)
+        )
 
-    def _extract_topics(self, texts: List[str]) -> List[Dict[str, Any]]:
+    def _extract_topics(self, texts: List[str]) -> List[Topic]:
         """Extract topics using TF-IDF."""
         if not texts:
             return []
@@ -130,52 +163,56 @@ class TopicDiscoveryService:
         tfidf_matrix = self.vectorizer.fit_transform(texts)
         feature_names = self.vectorizer.get_feature_names_out()
         
-        # Extract top terms as topics
-        topics = []
-        for idx, score in enumerate(tfidf_matrix.sum(axis=0).A1):
-            if score > 0:
-                topics.append({
-                    'term': feature_names[idx],
-                    'score': float(score),
-                    'timestamp': datetime.utcnow().isoformat()
-                })
+        # Rank terms with nonzero total score, highest first (stable for ties)
+        scores = np.asarray(tfidf_matrix.sum(axis=0)).ravel()
+        nonzero = np.flatnonzero(scores > 0)
+        ranked = nonzero[np.argsort(-scores[nonzero], kind='stable')]
         
-        return sorted(topics, key=lambda x: x['score'], reverse=True)
+        # Extract top terms as topics
+        timestamp = datetime.utcnow().isoformat()
+        return [
+            Topic(
+                term=feature_names[idx],
+                score=float(scores[idx]),
+                timestamp=timestamp,
+                metadata={}
+            )
+            for idx in ranked
+        ]
 
-    def _score_topics(self, topics: List[Dict[str, Any]], data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _score_topics(self, topics: List[Topic], data: Dict[str, Any]) -> List[Topic]:
         """Score and filter topics based on configuration criteria."""
-        scored_topics = []
+        min_score = self.config['analysis']['min_trend_score']
+        max_topics = self.config['analysis']['max_topics_per_batch']
         
-        for topic in topics:
-            if topic['score'] >= self.config['analysis']['min_trend_score']:
-                # Enrich topic with additional metadata
-                topic['metadata'] = {
-                    'source': data.get('source', 'unknown'),
-                    'region': data.get('region', 'global'),
-                    'category': self._determine_category(topic['term'])
-                }
-                scored_topics.append(topic)
-                
-                if len(scored_topics) >= self.config['analysis']['max_topics_per_batch']:
-                    break
+        scored_topics = [topic for topic in topics if topic.score >= min_score][:max_topics]
+        
+        # Categorize all selected terms in one pass
+        categories = self._determine_categories([topic.term for topic in scored_topics])
+        
+        for topic, category in zip(scored_topics, categories):
+            # Enrich topic with additional metadata
+            topic.metadata = {
+                'source': data.get('source', 'unknown'),
+                'region': data.get('region', 'global'),
+                'category': category
+            }
         
         return scored_topics
 
+    def _determine_categories(self, terms: List[str]) -> List[str]:
+        """Determine categories for several topic terms, tagging each unique term once."""
+        categories = {term: self._determine_category(term) for term in set(terms)}
+        return [categories[term] for term in terms]
+
     def _determine_category(self, term: str) -> str:
         """Determine the category of a topic term using NLP."""
-        # Basic category determination based on POS tagging
-        pos_tag = nltk.pos_tag([term])[0][1]
-        
-        if pos_tag.startswith('NN'):
-            return 'entity'
-        elif pos_tag.startswith('VB'):
-            return 'action'
-        elif pos_tag.startswith('JJ'):
-            return 'attribute'
-        else:
-            return 'other'
-
-    async def publish_topics(self, topics: List[Dict[str, Any]]) -> None:
+        # Basic category determination based on POS tagging; each term is
+        # tagged on its own so neighbouring terms don't act as context
+        pos_tag = self.tagger.tag([term])[0][1]
+        return POS_CATEGORIES.get(pos_tag[:2], 'other')
+
+    async def publish_topics(self, topics: List[Topic]) -> None:
         """Publish discovered topics to Pub/Sub."""
         if not self.publisher:
             logger.warning("Pub/Sub publisher not initialized, skipping publish")
@@ -184,25 +221,47 @@ class TopicDiscoveryService:
         try:
             topic_path = self.config['pubsub']['output_topic']
             
+            # Issue every publish up front so the client can batch them; completion
+            # is handled by callbacks instead of blocking on each result
             for topic in topics:
-                data = json.dumps(topic).encode('utf-8')
-                future = self.publisher.publish(topic_path, data)
-                future.result()  # Wait for publishing to complete
+                future = self.publisher.publish(
+                    topic_path,
+                    orjson.dumps(topic, default=str, option=ORJSON_OPTIONS)
+                )
+                self._pending_publishes.add(future)
+                future.add_done_callback(self._on_publish_done)
                 
-            logger.info(f"Successfully published {len(topics)} topics")
+            logger.info(f"Queued {len(topics)} topics for publishing")
         except Exception as e:
             logger.error(f"Error publishing topics: {str(e)}")
             raise
 
-    async def discover_trends(self) -> List[Dict[str, Any]]:
+    def _on_publish_done(self, future: futures.Future) -> None:
+        """Stop tracking a completed publish, logging it if it failed."""
+        self._pending_publishes.discard(future)
+        exception = future.exception()
+        if exception is not None:
+            logger.error(f"Error publishing topic: {str(exception)}")
+
+    async def flush(self) -> None:
+        """Wait for all queued publishes to complete."""
+        pending = list(self._pending_publishes)
+        if not pending:
+            return
+        
+        await asyncio.to_thread(futures.wait, pending)
+        logger.info(f"Flushed {len(pending)} queued publishes")
+
+    async def discover_trends(self) -> List[Topic]:
         """Discover trends from multiple Google sources."""
         try:
-            # Gather trends from different sources concurrently
+            # Gather trends from different sources concurrently; the client
+            # libraries block on HTTP, so each source runs in its own thread
             tasks = [
-                self._get_google_trends(),
-                self._get_youtube_trends(),
-                self._get_news_trends(),
-                self._analyze_search_trends()
+                asyncio.to_thread(self._get_google_trends),
+                asyncio.to_thread(self._get_youtube_trends),
+                asyncio.to_thread(self._get_news_trends),
+                asyncio.to_thread(self._analyze_search_trends)
             ]
             
             results = await asyncio.gather(*tasks)
@@ -216,17 +275,21 @@ class TopicDiscoveryService:
             scored_trends = self._score_topics(all_trends, {'source': 'google'})
             
             # Add trend categories using Natural Language API
-            enriched_trends = await self._enrich_trends_with_categories(scored_trends)
+            enriched_trends = await asyncio.to_thread(
+                self._enrich_trends_with_categories,
+                scored_trends
+            )
             
             return enriched_trends
         except Exception as e:
             logger.error(f"Error discovering trends: {str(e)}")
             raise
 
-    async def _get_google_trends(self) -> List[Dict[str, Any]]:
+    def _get_google_trends(self) -> List[Topic]:
         """Get trending topics from Google Trends using Pytrends."""
         try:
             trends = []
+            timestamp = datetime.utcnow().isoformat()
             region = self.config['data_sources']['google_trends']['region']
             
             # Get real-time trending searches
@@ -235,50 +298,60 @@ class TopicDiscoveryService:
             # Get daily trending searches
             daily_trends = self.pytrends.today_searches(pn=region)
             
-            # Process trending searches
-            for index, term in enumerate(trending_searches):
-                # Get more details about this trend
-                self.pytrends.build_payload([term], timeframe='now 1-d', geo=region)
+            # Process trending searches in batches sharing one payload per request
+            trending_terms = list(trending_searches)
+            for start in range(0, len(trending_terms), PYTRENDS_MAX_KEYWORDS):
+                batch = trending_terms[start:start + PYTRENDS_MAX_KEYWORDS]
+                
+                # Get more details about these trends
+                self.pytrends.build_payload(batch, timeframe='now 1-d', geo=region)
                 
                 # Get related queries
                 related_queries = self.pytrends.related_queries()
-                top_queries = related_queries.get(term, {}).get('top', pd.DataFrame())
                 
                 # Get interest by region
                 interest_by_region = self.pytrends.interest_by_region(resolution='COUNTRY')
                 
-                trends.append({
-                    'term': term,
-                    'score': 1.0 - (index / len(trending_searches)),  # Normalize score based on position
-                    'timestamp': datetime.utcnow().isoformat(),
-                    'metadata': {
-                        'source': 'google_trends',
-                        'region': region,
-                        'rank': index + 1,
-                        'related_queries': top_queries.to_dict() if not top_queries.empty else {},
-                        'regional_interest': interest_by_region.to_dict() if not interest_by_region.empty else {},
-                        'type': 'trending_search'
-                    }
-                })
+                for index, term in enumerate(batch, start=start):
+                    top_queries = related_queries.get(term, {}).get('top', pd.DataFrame())
+                    
+                    trends.append(Topic(
+                        term=term,
+                        score=1.0 - (index / len(trending_terms)),  # Normalize score based on position
+                        timestamp=timestamp,
+                        metadata={
+                            'source': 'google_trends',
+                            'region': region,
+                            'rank': index + 1,
+                            'related_queries': top_queries.to_dict() if not top_queries.empty else {},
+                            'regional_interest': (
+                                interest_by_region[[term]].to_dict()
+                                if term in interest_by_region.columns else {}
+                            ),
+                            'type': 'trending_search'
+                        }
+                    ))
             
             # Process daily trends
+            seen_terms = {t.term for t in trends}
             for index, term in enumerate(daily_trends):
-                if term not in [t['term'] for t in trends]:  # Avoid duplicates
-                    trends.append({
-                        'term': term,
-                        'score': 0.5 - (index / len(daily_trends)),  # Lower score for daily trends
-                        'timestamp': datetime.utcnow().isoformat(),
-                        'metadata': {
+                if term not in seen_terms:  # Avoid duplicates
+                    seen_terms.add(term)
+                    trends.append(Topic(
+                        term=term,
+                        score=0.5 - (index / len(daily_trends)),  # Lower score for daily trends
+                        timestamp=timestamp,
+                        metadata={
                             'source': 'google_trends',
                             'region': region,
                             'rank': index + 1,
                             'type': 'daily_trend'
                         }
-                    })
+                    ))
             
             # Get interest over time for top trends
             if trends:
-                top_terms = [t['term'] for t in trends[:5]]  # Get top 5 trends
+                top_terms = [t.term for t in trends[:PYTRENDS_MAX_KEYWORDS]]  # Get top 5 trends
                 self.pytrends.build_payload(
                     top_terms,
                     timeframe='now 7-d',
@@ -289,18 +362,22 @@ class TopicDiscoveryService:
                 
                 # Update trends with interest over time data
                 for trend in trends:
-                    if trend['term'] in interest_over_time.columns:
-                        trend['metadata']['interest_over_time'] = interest_over_time[trend['term']].to_dict()
+                    if trend.term in interest_over_time.columns:
+                        trend.metadata['interest_over_time'] = {
+                            point.isoformat(): value
+                            for point, value in interest_over_time[trend.term].items()
+                        }
             
             return trends
         except Exception as e:
             logger.error(f"Error fetching Google Trends: {str(e)}")
             return []
 
-    async def _get_youtube_trends(self) -> List[Dict[str, Any]]:
+    def _get_youtube_trends(self) -> List[Topic]:
         """Get trending topics from YouTube."""
         try:
             trends = []
+            timestamp = datetime.utcnow().isoformat()
             region = self.config['data_sources']['google_trends']['region']
             
             # Get trending videos
@@ -313,11 +390,11 @@ class TopicDiscoveryService:
             response = request.execute()
             
             for video in response.get('items', []):
-                trends.append({
-                    'term': video['snippet']['title'],
-                    'score': float(video['statistics'].get('viewCount', 0)) / 1000000,
-                    'timestamp': datetime.utcnow().isoformat(),
-                    'metadata': {
+                trends.append(Topic(
+                    term=video['snippet']['title'],
+                    score=float(video['statistics'].get('viewCount', 0)) / 1000000,
+                    timestamp=timestamp,
+                    metadata={
                         'source': 'youtube',
                         'region': region,
                         'category': video['snippet'].get('categoryId'),
@@ -325,17 +402,18 @@ class TopicDiscoveryService:
                         'views': video['statistics'].get('viewCount'),
                         'likes': video['statistics'].get('likeCount')
                     }
-                })
+                ))
             
             return trends
         except Exception as e:
             logger.error(f"Error fetching YouTube trends: {str(e)}")
             return []
 
-    async def _get_news_trends(self) -> List[Dict[str, Any]]:
+    def _get_news_trends(self) -> List[Topic]:
         """Analyze trending topics from news articles."""
         try:
             trends = []
+            timestamp = datetime.utcnow().isoformat()
             
             # Analyze entities in news content
             document = language_v1.Document(
@@ -350,27 +428,28 @@ class TopicDiscoveryService:
             
             for entity in response.entities:
                 if entity.salience > 0.1:  # Filter for significant entities
-                    trends.append({
-                        'term': entity.name,
-                        'score': float(entity.salience),
-                        'timestamp': datetime.utcnow().isoformat(),
-                        'metadata': {
+                    trends.append(Topic(
+                        term=entity.name,
+                        score=float(entity.salience),
+                        timestamp=timestamp,
+                        metadata={
                             'source': 'news',
                             'type': entity.type_.name,
                             'mentions': len(entity.mentions),
                             'sentiment': entity.sentiment.score if entity.sentiment else 0
                         }
-                    })
+                    ))
             
             return trends
         except Exception as e:
             logger.error(f"Error analyzing news trends: {str(e)}")
             return []
 
-    async def _analyze_search_trends(self) -> List[Dict[str, Any]]:
+    def _analyze_search_trends(self) -> List[Topic]:
         """Analyze search trends using Natural Language API."""
         try:
             trends = []
+            timestamp = datetime.utcnow().isoformat()
             search_data = self._get_search_data()
             
             # Analyze text with Natural Language API
@@ -385,16 +464,16 @@ class TopicDiscoveryService:
             )
             
             for entity in response.entities:
-                trends.append({
-                    'term': entity.name,
-                    'score': float(entity.salience),
-                    'timestamp': datetime.utcnow().isoformat(),
-                    'metadata': {
+                trends.append(Topic(
+                    term=entity.name,
+                    score=float(entity.salience),
+                    timestamp=timestamp,
+                    metadata={
                         'source': 'search',
                         'type': entity.type_.name,
                         'mentions': len(entity.mentions)
                     }
-                })
+                ))
             
             return trends
         except Exception as e:
@@ -413,29 +492,46 @@ class TopicDiscoveryService:
         # This would typically involve getting data from Search Console API
         return ""
 
-    async def _enrich_trends_with_categories(self, trends: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _enrich_trends_with_categories(self, trends: List[Topic]) -> List[Topic]:
         """Enrich trends with categories using Natural Language API."""
         try:
+            if not trends:
+                return trends
+
+            # Analyze all terms in a single newline-delimited document
+            document = language_v1.Document(
+                content='\n'.join(trend.term for trend in trends),
+                type_=language_v1.Document.Type.PLAIN_TEXT,
+            )
+            
+            # Analyze entities
+            response = self.language_client.analyze_entities(
+                document=document,
+                encoding_type=language_v1.EncodingType.UTF8
+            )
+            
+            # UTF-8 byte offset where each term starts in the document
+            term_starts = []
+            offset = 0
             for trend in trends:
-                # Create a document for analysis
-                document = language_v1.Document(
-                    content=trend['term'],
-                    type_=language_v1.Document.Type.PLAIN_TEXT,
-                )
-                
-                # Analyze entities
-                response = self.language_client.analyze_entities(
-                    document=document,
-                    encoding_type=language_v1.EncodingType.UTF8
-                )
-                
-                # Extract categories from entities
-                if response.entities:
-                    main_entity = response.entities[0]
-                    trend['metadata']['category'] = main_entity.type_.name
-                    trend['metadata']['salience'] = main_entity.salience
-                    if main_entity.metadata:
-                        trend['metadata']['entity_metadata'] = dict(main_entity.metadata)
+                term_starts.append(offset)
+                offset += len(trend.term.encode('utf-8')) + 1
+            
+            # Map each term to its most salient entity via mention offsets
+            main_entities: Dict[int, Entity] = {}
+            for entity in sorted(response.entities, key=lambda e: e.salience, reverse=True):
+                for mention in entity.mentions:
+                    index = bisect.bisect_right(term_starts, mention.text.begin_offset) - 1
+                    if index >= 0:
+                        main_entities.setdefault(index, entity)
+            
+            # Extract categories from entities
+            for index, main_entity in main_entities.items():
+                metadata = trends[index].metadata
+                metadata['category'] = main_entity.type_.name
+                metadata['salience'] = main_entity.salience
+                if main_entity.metadata:
+                    metadata['entity_metadata'] = dict(main_entity.metadata)
                 
             return trends
         except Exception as e:
@@ -445,6 +541,13 @@ class TopicDiscoveryService:
 # Initialize the service
 topic_discovery_service = TopicDiscoveryService()
 
+def _json_response(payload: Dict[str, Any]) -> Response:
+    """Serialize a payload with orjson, bypassing FastAPI's jsonable_encoder."""
+    return Response(
+        content=orjson.dumps(payload, default=str, option=ORJSON_OPTIONS),
+        media_type="application/json"
+    )
+
 class RawData(BaseModel):
     """Pydantic model for raw data input."""
     source: str
@@ -461,11 +564,11 @@ async def process_data(data: RawData):
         # Publish the discovered topics
         await topic_discovery_service.publish_topics(discovered_topics)
         
-        return {
+        return _json_response({
             "status": "success",
             "topics_discovered": len(discovered_topics),
             "topics": discovered_topics
-        }
+        })
     except Exception as e:
         logger.error(f"Error in process_data endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -483,15 +586,27 @@ async def get_trends(background_tasks: BackgroundTasks):
             discovered_trends
         )
         
-        return {
+        return _json_response({
             "status": "success",
             "trends_discovered": len(discovered_trends),
             "trends": discovered_trends
-        }
+        })
     except Exception as e:
         logger.error(f"Error in get_trends endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.on_event("shutdown")
+async def flush_publishes():
+    """Wait for queued publishes before the worker exits."""
+    await topic_discovery_service.flush()
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv("WEB_CONCURRENCY", 2))
+    ) 
\ No newline at end of file
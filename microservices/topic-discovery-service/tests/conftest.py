@@ -0,0 +1,61 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+
+# Fixed entity returned by every Natural Language analyze_entities call
+MOCK_ENTITY = SimpleNamespace(
+    name='artificial intelligence',
+    salience=0.9,
+    type_=SimpleNamespace(name='OTHER'),
+    mentions=[SimpleNamespace(text=SimpleNamespace(begin_offset=0))],
+    sentiment=SimpleNamespace(score=0.2),
+    metadata={}
+)
+
+# Fixed YouTube videos().list() response
+MOCK_YOUTUBE_RESPONSE = {
+    'items': [
+        {
+            'snippet': {'title': 'AI explained', 'categoryId': '28', 'tags': ['ai']},
+            'statistics': {'viewCount': '2000000', 'likeCount': '1000'}
+        }
+    ]
+}
+
+_patchers = []
+
+def _mock_language_client():
+    client = MagicMock()
+    client.analyze_entities.return_value = SimpleNamespace(entities=[MOCK_ENTITY])
+    return client
+
+def _mock_youtube(*args, **kwargs):
+    youtube = MagicMock()
+    youtube.videos.return_value.list.return_value.execute.return_value = MOCK_YOUTUBE_RESPONSE
+    return youtube
+
+def _mock_pytrends(*args, **kwargs):
+    pytrends = MagicMock()
+    pytrends.trending_searches.return_value = pd.DataFrame()
+    pytrends.today_searches.return_value = pd.Series(dtype=object)
+    return pytrends
+
+def pytest_configure(config):
+    """Replace networked Google clients before main builds its module-level service."""
+    _patchers.extend([
+        patch('google.cloud.logging.Client'),
+        patch('google.cloud.pubsub_v1.PublisherClient'),
+        patch('google.cloud.language_v1.LanguageServiceClient', side_effect=_mock_language_client),
+        patch('google.cloud.videointelligence_v1.VideoIntelligenceServiceClient'),
+        patch('googleapiclient.discovery.build', side_effect=_mock_youtube),
+        patch('pytrends.request.TrendReq', side_effect=_mock_pytrends)
+    ])
+    for patcher in _patchers:
+        patcher.start()
+
+def pytest_unconfigure(config):
+    """Restore the real client classes."""
+    for patcher in reversed(_patchers):
+        patcher.stop()
+    _patchers.clear()
@@ -3,7 +3,7 @@ import json
 from datetime import datetime
 from unittest.mock import MagicMock, patch
 from google.cloud import pubsub_v1
-from main import TopicDiscoveryService, RawData
+from main import TopicDiscoveryService, RawData, Topic
 
 @pytest.fixture
 def mock_publisher():
@@ -26,16 +26,16 @@ async def test_pubsub_integration(mock_publisher, mock_subscriber):
     
     # Test data
     test_topics = [
-        {
-            'term': 'artificial intelligence',
-            'score': 0.85,
-            'timestamp': datetime.utcnow().isoformat(),
-            'metadata': {
+        Topic(
+            term='artificial intelligence',
+            score=0.85,
+            timestamp=datetime.utcnow().isoformat(),
+            metadata={
                 'source': 'test',
                 'region': 'global',
                 'category': 'entity'
             }
-        }
+        )
     ]
     
     # Test publishing topics
@@ -79,18 +79,17 @@ async def test_end_to_end_processing():
     assert len(topics) > 0
     
     # Check if common terms were identified
-    terms = [topic['term'].lower() for topic in topics]
+    terms = [topic.term.lower() for topic in topics]
     assert any('quantum' in term for term in terms)
     assert any('ai' in term or 'artificial' in term for term in terms)
     
     # Verify topic structure
     for topic in topics:
-        assert 'term' in topic
-        assert 'score' in topic
-        assert 'timestamp' in topic
-        assert 'metadata' in topic
-        assert topic['score'] >= 0.6  # Minimum trend score from config
-        assert topic['metadata']['category'] in ['entity', 'action', 'attribute', 'other']
+        assert isinstance(topic, Topic)
+        assert topic.term
+        assert topic.timestamp
+        assert topic.score >= 0.6  # Minimum trend score from config
+        assert topic.metadata['category'] in ['entity', 'action', 'attribute', 'other']
 
 @pytest.mark.asyncio
 async def test_error_handling():
@@ -140,6 +139,6 @@ async def test_config_integration():
     
     # Verify filtering based on config
     for topic in topics:
-        assert len(topic['term']) >= service.config['nlp']['min_token_length']
-        assert len(topic['term']) <= service.config['nlp']['max_token_length']
-        assert topic['score'] >= service.config['analysis']['min_trend_score'] 
\ No newline at end of file
+        assert len(topic.term) >= service.config['nlp']['min_token_length']
+        assert len(topic.term) <= service.config['nlp']['max_token_length']
+        assert topic.score >= service.config['analysis']['min_trend_score'] 
\ No newline at end of file
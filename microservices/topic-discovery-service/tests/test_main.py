@@ -6,14 +6,18 @@ from fastapi.testclient import TestClient
 # Import the app and service directly since we've handled the imports in main.py
 from main import app, TopicDiscoveryService
 
-client = TestClient(app)
+@pytest.fixture(scope="session")
+def client():
+    """Create a test client shared across the session."""
+    with TestClient(app) as test_client:
+        yield test_client
 
 @pytest.fixture
 def topic_discovery_service():
     service = TopicDiscoveryService()
     return service
 
-def test_extract_text_content(topic_discovery_service):
+def test_iter_text_content(topic_discovery_service):
     # Test data
     data = {
         'social_media': [
@@ -24,7 +28,7 @@ def test_extract_text_content(topic_discovery_service):
     }
     
     # Extract text content
-    texts = topic_discovery_service._extract_text_content(data)
+    texts = list(topic_discovery_service._iter_text_content(data))
     
     # Assertions
     assert len(texts) == 4
@@ -33,12 +37,15 @@ def test_extract_text_content(topic_discovery_service):
     assert 'test query 1' in texts
     assert 'test query 2' in texts
 
-def test_preprocess_texts(topic_discovery_service):
+def test_extract_and_preprocess(topic_discovery_service):
     # Test data
-    texts = ['This is a TEST post!', 'Another TEST post with NUMBERS 123']
+    data = {
+        'social_media': [{'text': 'This is a TEST post!'}],
+        'search_queries': ['Another TEST post with NUMBERS 123']
+    }
     
-    # Preprocess texts
-    processed_texts = topic_discovery_service._preprocess_texts(texts)
+    # Extract and preprocess texts
+    processed_texts = topic_discovery_service._extract_and_preprocess(data)
     
     # Assertions
     assert len(processed_texts) == 2
@@ -52,8 +59,14 @@ def test_determine_category(topic_discovery_service):
     assert topic_discovery_service._determine_category('happy') == 'attribute'
     assert topic_discovery_service._determine_category('computer') == 'entity'
 
+def test_determine_categories(topic_discovery_service):
+    # Batch results match per-term categories, including repeated terms
+    terms = ['running', 'computer', 'happy', 'computer']
+    categories = topic_discovery_service._determine_categories(terms)
+    assert categories == ['action', 'entity', 'attribute', 'entity']
+
 @pytest.mark.asyncio
-async def test_process_endpoint():
+async def test_process_endpoint(client):
     # Test data
     test_data = {
         'source': 'test',
@@ -77,7 +90,7 @@ async def test_process_endpoint():
     assert 'topics_discovered' in response.json()
     assert 'topics' in response.json()
 
-def test_invalid_request():
+def test_invalid_request(client):
     # Test data with missing required fields
     invalid_data = {
         'content': {}  # Missing required fields
@@ -87,4 +100,16 @@ def test_invalid_request():
     response = client.post('/process', json=invalid_data)
     
     # Assertions
-    assert response.status_code == 422  # Validation error 
\ No newline at end of file
+    assert response.status_code == 422  # Validation error 
+
+
+def test_trends_endpoint(client):
+    # Trend sources are stubbed in conftest, so no network calls are made
+    response = client.get('/trends')
+    
+    # Assertions
+    assert response.status_code == 200
+    assert response.json()['status'] == 'success'
+    terms = [trend['term'] for trend in response.json()['trends']]
+    assert 'AI explained' in terms
+    assert 'artificial intelligence' in terms
@@ -1,21 +1,32 @@
+import asyncio
+import functools
 import json
 import os
 import logging
-from typing import List, Dict, Any, Optional
+from collections import Counter
+from contextlib import asynccontextmanager
+from concurrent import futures
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 
 import numpy as np
+import orjson
 import pandas as pd
-from fastapi import FastAPI, HTTPException
+from cachetools import TTLCache
+from fastapi import FastAPI, HTTPException, Request
 from pydantic import BaseModel
-from google.cloud import pubsub_v1, bigquery, aiplatform
+from google.cloud import pubsub_v1, bigquery, aiplatform, storage
 from google.cloud import logging as cloud_logging
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+try:
+    from google.cloud import bigquery_storage
+except ImportError:
+    bigquery_storage = None
 from dotenv import load_dotenv
 
-# Initialize FastAPI app
-app = FastAPI(title="Topic Prioritization Service")
-
 # Load environment variables
 load_dotenv()
 
@@ -25,6 +36,15 @@ if cloud_logging:
     logging_client = cloud_logging.Client()
     logger = logging_client.logger("topic-prioritization-service")
 
+# Model feature order, mapped to each feature's key in the scoring weights config
+FEATURE_WEIGHT_KEYS = {
+    'search_volume': 'search_volume',
+    'competition': 'competition',
+    'trend_score': 'trend_score',
+    'hitl_score': 'hitl_feedback'
+}
+FEATURE_KEYS = tuple(FEATURE_WEIGHT_KEYS)
+
 class TopicData(BaseModel):
     """Pydantic model for topic data."""
     term: str
@@ -35,12 +55,75 @@ class TopicData(BaseModel):
 class TopicPrioritizationService:
     def __init__(self):
         self.config = self._load_config()
-        self.publisher = pubsub_v1.PublisherClient()
-        self.subscriber = pubsub_v1.SubscriberClient()
-        self.bigquery_client = bigquery.Client()
-        self.model_endpoint = None
-        self._initialize_vertex_ai()
-        self._setup_scheduler()
+        
+        # Fallback scoring weights in feature order, for a single matrix product
+        weights = self.config['scoring']['weights']
+        self.feature_weights = np.array(
+            [weights[FEATURE_WEIGHT_KEYS[key]] for key in FEATURE_KEYS],
+            dtype=float
+        )
+        
+        self._pending_publishes = set()
+        
+        # Publish invariants, resolved once instead of per message
+        self._topic_path = self.config['pubsub']['output_topic']
+        self._static_attrs = {'service': 'topic-prioritization', 'schema': 'v1'}
+        
+        # BigQuery enrichment factors by term; trending terms recur within minutes
+        cache_config = self.config['data_sources']['bigquery'].get('enrichment_cache', {})
+        self.enrichment_cache = TTLCache(
+            maxsize=cache_config.get('max_size', 10000),
+            ttl=cache_config.get('ttl_seconds', 300)
+        )
+        
+        # Requests per term since the last hot-term refresh
+        self.term_hits = Counter()
+        self._hot_terms_task = None
+        
+        # Resolved in the background after startup; scoring falls back until then
+        self.model_endpoint: Optional[aiplatform.Endpoint] = None
+        self._endpoint_task = None
+        self._training_task = None
+        
+        self._build_enrichment_queries()
+        
+        # Loaded off the event loop at startup (it may download); see _load_onnx_model
+        self.onnx_session = None
+        self.onnx_input_name = None
+
+    # Google clients are created on first use so workers start without
+    # paying for clients (and channels) a request path may never touch
+    @functools.cached_property
+    def publisher(self) -> pubsub_v1.PublisherClient:
+        """Pub/Sub publisher that batches publishes instead of one RPC per message."""
+        batch_settings = self.config['pubsub'].get('batch_settings', {})
+        return pubsub_v1.PublisherClient(
+            batch_settings=pubsub_v1.types.BatchSettings(
+                max_messages=batch_settings.get('max_messages', 1000),
+                max_bytes=batch_settings.get('max_bytes', 40000),
+                max_latency=batch_settings.get('max_latency', 0.05)
+            )
+        )
+
+    @functools.cached_property
+    def subscriber(self) -> pubsub_v1.SubscriberClient:
+        """Pub/Sub subscriber client."""
+        return pubsub_v1.SubscriberClient()
+
+    @functools.cached_property
+    def bigquery_client(self) -> bigquery.Client:
+        """BigQuery client for enrichment and training queries."""
+        return bigquery.Client()
+
+    @functools.cached_property
+    def storage_client(self) -> storage.Client:
+        """Cloud Storage client for fetching and publishing the ONNX export."""
+        return storage.Client()
+
+    @functools.cached_property
+    def bqstorage_client(self) -> Optional[Any]:
+        """BigQuery Storage Read API client for columnar (Arrow) result downloads."""
+        return bigquery_storage.BigQueryReadClient() if bigquery_storage else None
 
     def _load_config(self) -> Dict[str, Any]:
         """Load configuration from JSON file."""
@@ -51,35 +134,141 @@ class TopicPrioritizationService:
         with open(config_path, 'r') as f:
             return json.load(f)
 
-    def _initialize_vertex_ai(self):
-        """Initialize Vertex AI endpoint."""
+    def _build_enrichment_queries(self):
+        """Build the parameterized enrichment SQL once; table names are fixed by config."""
+        dataset = self.config['data_sources']['bigquery']['dataset']
+        tables = self.config['data_sources']['bigquery']['tables']
+        
+        self.enrich_query = f"""
+        SELECT
+            COALESCE(s.search_volume, 0) as search_volume,
+            COALESCE(s.competition, 0) as competition,
+            COALESCE(AVG(f.score), 0) as hitl_score
+        FROM `{dataset}.{tables['search_data']}` s
+        LEFT JOIN `{dataset}.{tables['feedback']}` f
+        ON s.term = f.term
+        WHERE s.term = @term
+        GROUP BY s.search_volume, s.competition
+        """
+        
+        self.enrich_batch_query = f"""
+        SELECT
+            s.term as term,
+            COALESCE(s.search_volume, 0) as search_volume,
+            COALESCE(s.competition, 0) as competition,
+            COALESCE(AVG(f.score), 0) as hitl_score
+        FROM `{dataset}.{tables['search_data']}` s
+        LEFT JOIN `{dataset}.{tables['feedback']}` f
+        ON s.term = f.term
+        WHERE s.term IN UNNEST(@terms)
+        GROUP BY s.term, s.search_volume, s.competition
+        """
+
+    def _init_aiplatform(self):
+        """Set the Vertex AI project and region for subsequent SDK calls."""
+        aiplatform.init(
+            project=os.getenv('GOOGLE_CLOUD_PROJECT'),
+            location=self.config['model']['vertex_ai']['region']
+        )
+
+    def _initialize_vertex_ai(self) -> aiplatform.Endpoint:
+        """Initialize Vertex AI endpoint; blocks on an API call, so call via a thread."""
+        self._init_aiplatform()
+        endpoint = aiplatform.Endpoint(
+            self.config['model']['vertex_ai']['endpoint_name']
+        )
+        logger.info("Successfully initialized Vertex AI endpoint")
+        return endpoint
+
+    async def resolve_model_endpoint(self) -> None:
+        """Resolve the Vertex AI endpoint, retrying with backoff; leaves it None if it stays unavailable."""
+        attempts = self.config['model']['vertex_ai'].get('init_attempts', 3)
+        for attempt in range(attempts):
+            if self.model_endpoint is not None:
+                # A retrain already deployed a newer endpoint
+                return
+            try:
+                self.model_endpoint = await asyncio.to_thread(self._initialize_vertex_ai)
+                return
+            except Exception as e:
+                logger.error(f"Error initializing Vertex AI (attempt {attempt + 1}/{attempts}): {str(e)}")
+                if attempt + 1 < attempts:
+                    await asyncio.sleep(2 ** attempt)
+        
+        logger.warning("Vertex AI endpoint unavailable; scoring with ONNX or weighted fallback")
+
+    def start_model_endpoint_resolution(self) -> None:
+        """Resolve the Vertex AI endpoint in the background; call from the running event loop."""
+        self._endpoint_task = asyncio.create_task(self.resolve_model_endpoint())
+
+    async def stop_model_endpoint_resolution(self) -> None:
+        """Cancel a still-running endpoint resolution."""
+        if self._endpoint_task:
+            self._endpoint_task.cancel()
+            try:
+                await self._endpoint_task
+            except asyncio.CancelledError:
+                pass
+            self._endpoint_task = None
+
+    def _onnx_locations(self) -> Tuple[Optional[str], Optional[str]]:
+        """Local path and shared GCS URI of the quantized ONNX export."""
+        onnx_config = self.config['model'].get('onnx', {})
+        return (
+            os.getenv('ONNX_MODEL_PATH', onnx_config.get('model_path')),
+            os.getenv('ONNX_MODEL_URI', onnx_config.get('gcs_uri'))
+        )
+
+    def _download_onnx_model(self, source_uri: str, model_path: str) -> None:
+        """Download an ONNX export to model_path, replacing it only once complete."""
+        os.makedirs(os.path.dirname(model_path), exist_ok=True)
+        partial_path = f"{model_path}.partial"
+        storage.Blob.from_string(source_uri, client=self.storage_client).download_to_filename(partial_path)
+        os.replace(partial_path, model_path)
+
+    def _load_onnx_model(self) -> None:
+        """Load the quantized ONNX export, downloading it if missing; blocks, so call via a thread."""
+        self.onnx_session = None
+        self.onnx_input_name = None
+        
+        model_path, model_uri = self._onnx_locations()
+        if not ort or not model_path:
+            return
+        
         try:
-            aiplatform.init(
-                project=os.getenv('GOOGLE_CLOUD_PROJECT'),
-                location=self.config['model']['vertex_ai']['region']
-            )
-            self.model_endpoint = aiplatform.Endpoint(
-                self.config['model']['vertex_ai']['endpoint_name']
+            if not os.path.exists(model_path) and model_uri:
+                self._download_onnx_model(model_uri, model_path)
+            if not os.path.exists(model_path):
+                return
+            
+            self.onnx_session = ort.InferenceSession(
+                model_path,
+                providers=['CPUExecutionProvider']
             )
-            logger.info("Successfully initialized Vertex AI endpoint")
+            self.onnx_input_name = self.onnx_session.get_inputs()[0].name
+            logger.info(f"Loaded ONNX model for in-process scoring: {model_path}")
         except Exception as e:
-            logger.error(f"Error initializing Vertex AI: {str(e)}")
-            self.model_endpoint = None
+            logger.error(f"Error loading ONNX model: {str(e)}")
+            self.onnx_session = None
 
-    def _setup_scheduler(self):
-        """Set up scheduled tasks."""
-        self.scheduler = AsyncIOScheduler()
+    def _publish_onnx_model(self, source_uri: str) -> None:
+        """Install a freshly trained ONNX export locally and at the shared URI; blocks, so call via a thread."""
+        model_path, model_uri = self._onnx_locations()
+        if not ort or not model_path:
+            return
         
-        # Schedule model retraining
-        self.scheduler.add_job(
-            self.train_model,
-            'cron',
-            day_of_week='sun',
-            hour=0,
-            minute=0
-        )
+        try:
+            self._download_onnx_model(source_uri, model_path)
+            # Replicas starting later pick the new export up from the shared URI
+            if model_uri:
+                storage.Blob.from_string(model_uri, client=self.storage_client).upload_from_filename(model_path)
+        except Exception as e:
+            # The previous export predates the new endpoint; score through the endpoint instead
+            logger.error(f"Error publishing ONNX model: {str(e)}")
+            self.onnx_session = None
+            return
         
-        self.scheduler.start()
+        self._load_onnx_model()
 
     async def process_topic(self, topic: TopicData) -> Dict[str, Any]:
         """Process and prioritize a single topic."""
@@ -111,87 +300,281 @@ class TopicPrioritizationService:
             logger.error(f"Error processing topic: {str(e)}")
             raise
 
+    async def process_topics(self, topics: List[TopicData]) -> List[Dict[str, Any]]:
+        """Process and prioritize a batch of topics with one query and one prediction."""
+        try:
+            if not topics:
+                return []
+            
+            # Get additional data from BigQuery for every term at once
+            enriched_data = await self._enrich_topic_data_batch(topics)
+            
+            # Score all topics with a single model call
+            priority_scores = await self._score_topic_batch(enriched_data)
+            
+            # Create prioritized topics
+            prioritized_at = datetime.utcnow().isoformat()
+            prioritized_topics = [
+                {
+                    'term': topic.term,
+                    'original_score': topic.score,
+                    'priority_score': float(priority_score),
+                    'metadata': {
+                        **topic.metadata,
+                        'priority_factors': topic_data,
+                        'prioritized_at': prioritized_at
+                    }
+                }
+                for topic, topic_data, priority_score in zip(topics, enriched_data, priority_scores)
+            ]
+            
+            # Publish the topics that meet the threshold
+            min_score = self.config['scoring']['thresholds']['min_priority_score']
+            for index in np.flatnonzero(priority_scores >= min_score):
+                await self.publish_topic(prioritized_topics[index])
+            
+            return prioritized_topics
+        except Exception as e:
+            logger.error(f"Error processing topic batch: {str(e)}")
+            raise
+
     async def _enrich_topic_data(self, topic: TopicData) -> Dict[str, float]:
         """Enrich topic data with BigQuery data."""
-        query = f"""
-        SELECT
-            COALESCE(s.search_volume, 0) as search_volume,
-            COALESCE(s.competition, 0) as competition,
-            COALESCE(AVG(f.score), 0) as hitl_score
-        FROM `{self.config['data_sources']['bigquery']['dataset']}.{self.config['data_sources']['bigquery']['tables']['search_data']}` s
-        LEFT JOIN `{self.config['data_sources']['bigquery']['dataset']}.{self.config['data_sources']['bigquery']['tables']['feedback']}` f
-        ON s.term = f.term
-        WHERE s.term = @term
-        GROUP BY s.search_volume, s.competition
-        """
+        self.term_hits[topic.term] += 1
+        term_factors = self.enrichment_cache.get(topic.term)
+        if term_factors is not None:
+            return self._topic_factors(topic, term_factors)
         
         job_config = bigquery.QueryJobConfig(
             query_parameters=[
                 bigquery.ScalarQueryParameter("term", "STRING", topic.term)
-            ]
+            ],
+            use_query_cache=True
         )
         
         try:
-            results = self.bigquery_client.query(query, job_config=job_config).result()
-            row = next(results, None)
+            rows = await asyncio.to_thread(self._run_query, self.enrich_query, job_config)
+            row = rows[0] if rows else None
             
-            if row:
-                return {
-                    'search_volume': float(row.search_volume),
-                    'competition': float(row.competition),
-                    'trend_score': float(topic.score),
-                    'hitl_score': float(row.hitl_score)
-                }
+            term_factors = self._term_factors(row)
+            self.enrichment_cache[topic.term] = term_factors
+            return self._topic_factors(topic, term_factors)
+        except Exception as e:
+            logger.error(f"Error querying BigQuery: {str(e)}")
+            raise
+
+    async def _enrich_topic_data_batch(self, topics: List[TopicData]) -> List[Dict[str, float]]:
+        """Enrich a batch of topics with BigQuery data, querying only uncached terms."""
+        self.term_hits.update(topic.term for topic in topics)
+        
+        # Serve repeated terms from the cache; only misses go to BigQuery
+        term_factors = {}
+        missing_terms = []
+        for term in {topic.term for topic in topics}:
+            cached = self.enrichment_cache.get(term)
+            if cached is None:
+                missing_terms.append(term)
             else:
-                return {
-                    'search_volume': 0.0,
-                    'competition': 0.0,
-                    'trend_score': float(topic.score),
-                    'hitl_score': 0.0
-                }
+                term_factors[term] = cached
+        
+        if missing_terms:
+            term_factors.update(await self._fetch_term_factors(missing_terms))
+        
+        return [self._topic_factors(topic, term_factors[topic.term]) for topic in topics]
+
+    async def _fetch_term_factors(self, terms: List[str]) -> Dict[str, Dict[str, float]]:
+        """Query enrichment factors for several terms in one query and cache them."""
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[
+                bigquery.ArrayQueryParameter("terms", "STRING", terms)
+            ],
+            use_query_cache=True
+        )
+        
+        try:
+            results = await asyncio.to_thread(self._run_query, self.enrich_batch_query, job_config)
+            rows = {row.term: row for row in results}
         except Exception as e:
             logger.error(f"Error querying BigQuery: {str(e)}")
             raise
+        
+        term_factors = {}
+        for term in terms:
+            term_factors[term] = self._term_factors(rows.get(term))
+            self.enrichment_cache[term] = term_factors[term]
+        return term_factors
+
+    async def _refresh_hot_terms(self) -> None:
+        """Re-fetch the most requested terms in bulk so they never expire from the cache."""
+        hot_config = self.config['data_sources']['bigquery'].get('hot_terms', {})
+        interval = hot_config.get('refresh_seconds', 60)
+        max_terms = hot_config.get('max_terms', 1000)
+        
+        while True:
+            await asyncio.sleep(interval)
+            
+            hot_terms = [term for term, _ in self.term_hits.most_common(max_terms)]
+            self.term_hits.clear()
+            if not hot_terms:
+                continue
+            
+            try:
+                await self._fetch_term_factors(hot_terms)
+            except Exception:
+                # Already logged; cached values are kept until they expire
+                continue
+
+    def start_hot_terms_refresh(self) -> None:
+        """Start refreshing hot terms in the background; call from the running event loop."""
+        self._hot_terms_task = asyncio.create_task(self._refresh_hot_terms())
+
+    async def stop_hot_terms_refresh(self) -> None:
+        """Cancel the background hot-term refresh."""
+        if self._hot_terms_task:
+            self._hot_terms_task.cancel()
+            try:
+                await self._hot_terms_task
+            except asyncio.CancelledError:
+                pass
+            self._hot_terms_task = None
+
+    def _run_query(self, query: str, job_config: bigquery.QueryJobConfig) -> List[Any]:
+        """Run a BigQuery query and fetch all result rows; blocks, so call via a thread."""
+        return list(self.bigquery_client.query(query, job_config=job_config).result())
+
+    @staticmethod
+    def _term_factors(row: Optional[Any]) -> Dict[str, float]:
+        """Extract the cacheable per-term factors from a BigQuery row."""
+        if row:
+            return {
+                'search_volume': float(row.search_volume),
+                'competition': float(row.competition),
+                'hitl_score': float(row.hitl_score)
+            }
+        return {
+            'search_volume': 0.0,
+            'competition': 0.0,
+            'hitl_score': 0.0
+        }
+
+    @staticmethod
+    def _topic_factors(topic: TopicData, term_factors: Dict[str, float]) -> Dict[str, float]:
+        """Combine cached per-term factors with the topic's own trend score."""
+        return {
+            'search_volume': term_factors['search_volume'],
+            'competition': term_factors['competition'],
+            'trend_score': float(topic.score),
+            'hitl_score': term_factors['hitl_score']
+        }
+
+    async def _score_topic_batch(self, batch_data: List[Dict[str, float]]) -> np.ndarray:
+        """Score a batch of topics with one model prediction or fallback scoring."""
+        # Stack features, one row per topic
+        features = self._feature_matrix(batch_data)
+        
+        if self.onnx_session or self.model_endpoint:
+            try:
+                # Get predictions for every row from the model in one call
+                return await self._predict(features)
+            except Exception as e:
+                logger.error(f"Error using prioritization model: {str(e)}")
+                # Fall back to weighted scoring
+        
+        return self._weighted_scores(features)
 
     async def _score_topic(self, topic_data: Dict[str, float]) -> float:
-        """Score topic using the Vertex AI model or fallback scoring."""
-        if self.model_endpoint:
+        """Score topic using the prioritization model or fallback scoring."""
+        # Prepare features for the model
+        features = self._feature_matrix([topic_data])
+        
+        if self.onnx_session or self.model_endpoint:
             try:
-                # Prepare features for the model
-                features = np.array([[
-                    topic_data['search_volume'],
-                    topic_data['competition'],
-                    topic_data['trend_score'],
-                    topic_data['hitl_score']
-                ]])
-                
                 # Get prediction from model
-                prediction = self.model_endpoint.predict(features)
+                prediction = await self._predict(features)
                 return float(prediction[0])
             except Exception as e:
-                logger.error(f"Error using Vertex AI model: {str(e)}")
+                logger.error(f"Error using prioritization model: {str(e)}")
                 # Fall back to weighted scoring
         
-        # Fallback: weighted scoring
-        weights = self.config['scoring']['weights']
-        score = sum(
-            topic_data[key] * weight
-            for key, weight in weights.items()
+        return float(self._weighted_scores(features)[0])
+
+    async def _predict(self, features: np.ndarray) -> np.ndarray:
+        """Predict scores for feature rows, in-process when an ONNX model is loaded."""
+        if self.onnx_session:
+            outputs = self.onnx_session.run(
+                None,
+                {self.onnx_input_name: features.astype(np.float32)}
+            )
+            return np.asarray(outputs[0], dtype=float).reshape(len(features))
+        
+        # The endpoint keeps one prediction client (and channel) for its lifetime
+        prediction = await asyncio.to_thread(
+            self.model_endpoint.predict,
+            instances=features.tolist()
+        )
+        return np.asarray(prediction.predictions, dtype=float).reshape(len(features))
+
+    @staticmethod
+    def _feature_matrix(batch_data: List[Dict[str, float]]) -> np.ndarray:
+        """Build the (N, 4) feature matrix in model feature order."""
+        return np.array(
+            [[topic_data[key] for key in FEATURE_KEYS] for topic_data in batch_data],
+            dtype=float
         )
-        return min(max(score, 0.0), 1.0)
 
-    async def publish_topic(self, topic: Dict[str, Any]) -> None:
-        """Publish prioritized topic to Pub/Sub."""
+    def _weighted_scores(self, features: np.ndarray) -> np.ndarray:
+        """Fallback scoring: weighted sum of each feature row, clamped to [0, 1]."""
+        return np.clip(features @ self.feature_weights, 0.0, 1.0)
+
+    async def publish_topic(self, topic: Dict[str, Any]) -> futures.Future:
+        """Queue prioritized topic for batched publishing to Pub/Sub."""
         try:
-            topic_path = self.config['pubsub']['output_topic']
-            data = json.dumps(topic).encode('utf-8')
-            future = self.publisher.publish(topic_path, data)
-            future.result()
-            logger.info(f"Successfully published prioritized topic: {topic['term']}")
+            data = orjson.dumps(
+                topic,
+                option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NAIVE_UTC
+            )
+            future = self.publisher.publish(self._topic_path, data, **self._static_attrs)
+            
+            # Track the publish until it completes; failures are logged from the callback
+            self._pending_publishes.add(future)
+            future.add_done_callback(self._on_publish_done)
+            
+            logger.info(f"Queued prioritized topic for publishing: {topic['term']}")
+            return future
         except Exception as e:
             logger.error(f"Error publishing topic: {str(e)}")
             raise
 
+    def _on_publish_done(self, future: futures.Future) -> None:
+        """Stop tracking a completed publish, logging it if it failed."""
+        self._pending_publishes.discard(future)
+        exception = future.exception()
+        if exception is not None:
+            logger.error(f"Error publishing topic: {str(exception)}")
+
+    async def flush(self) -> None:
+        """Wait for all queued publishes to complete."""
+        pending = list(self._pending_publishes)
+        if not pending:
+            return
+        
+        await asyncio.to_thread(futures.wait, pending)
+        logger.info(f"Flushed {len(pending)} queued publishes")
+
+    def start_training(self) -> bool:
+        """Start training in the background; returns False if a run is already in progress."""
+        if self._training_task and not self._training_task.done():
+            return False
+        self._training_task = asyncio.create_task(self._run_training())
+        return True
+
+    async def _run_training(self) -> None:
+        """Run one training job as a background task; failures are logged by train_model."""
+        try:
+            await self.train_model()
+        except Exception:
+            pass
+
     async def train_model(self) -> None:
         """Train and deploy a new model using historical data."""
         try:
@@ -211,7 +594,12 @@ class TopicPrioritizationService:
             GROUP BY s.search_volume, s.competition, t.score, h.success_rate
             """
             
-            df = self.bigquery_client.query(query).to_dataframe()
+            # Download results as Arrow streams over the Storage Read API
+            df = await asyncio.to_thread(
+                lambda: self.bigquery_client.query(query).to_dataframe(
+                    bqstorage_client=self.bqstorage_client
+                )
+            )
             
             if len(df) < 100:  # Minimum required samples
                 logger.warning("Insufficient training data")
@@ -221,15 +609,23 @@ class TopicPrioritizationService:
             X = df[['search_volume', 'competition', 'trend_score', 'hitl_score']].values
             y = df['label'].values
             
-            # Create and train model using Vertex AI
+            # Create and train model using Vertex AI; the SDK calls block until
+            # the job and deployment finish, so keep them off the event loop
+            await asyncio.to_thread(self._init_aiplatform)
             training_job = aiplatform.CustomTrainingJob(
                 display_name=self.config['model']['vertex_ai']['model_name'],
                 script_path="train.py",
                 container_uri="us-docker.pkg.dev/vertex-ai/training/tf-cpu.2-12:latest",
-                requirements=["tensorflow==2.12.0", "scikit-learn==1.3.2"]
+                requirements=[
+                    "tensorflow==2.12.0",
+                    "scikit-learn==1.3.2",
+                    "tf2onnx==1.16.1",
+                    "onnxruntime==1.16.3"
+                ]
             )
             
-            model = training_job.run(
+            model = await asyncio.to_thread(
+                training_job.run,
                 dataset=X,
                 labels=y,
                 training_args={
@@ -240,28 +636,47 @@ class TopicPrioritizationService:
             )
             
             # Deploy model to endpoint
-            endpoint = model.deploy(
+            endpoint = await asyncio.to_thread(
+                model.deploy,
                 machine_type="n1-standard-2",
                 min_replica_count=1,
                 max_replica_count=2
             )
             
-            # Update service to use new endpoint
+            # Update service to use new endpoint and its ONNX export, which
+            # train.py writes next to the saved model
             self.model_endpoint = endpoint
+            await asyncio.to_thread(self._publish_onnx_model, f"{model.uri}/model_int8.onnx")
+            
+            # Feedback used for enrichment may have changed since the cache was filled
+            self.enrichment_cache.clear()
             logger.info("Successfully trained and deployed new model")
             
         except Exception as e:
             logger.error(f"Error training model: {str(e)}")
             raise
 
-# Initialize service
-prioritization_service = TopicPrioritizationService()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Build the service per worker process and flush its publishes on shutdown."""
+    # Constructed here rather than at import so forked workers don't share gRPC channels
+    app.state.svc = TopicPrioritizationService()
+    await asyncio.to_thread(app.state.svc._load_onnx_model)
+    app.state.svc.start_model_endpoint_resolution()
+    app.state.svc.start_hot_terms_refresh()
+    yield
+    await app.state.svc.stop_model_endpoint_resolution()
+    await app.state.svc.stop_hot_terms_refresh()
+    await app.state.svc.flush()
+
+# Initialize FastAPI app
+app = FastAPI(title="Topic Prioritization Service", lifespan=lifespan)
 
 @app.post("/prioritize")
-async def prioritize_topic(topic: TopicData):
+async def prioritize_topic(topic: TopicData, request: Request):
     """API endpoint to prioritize a topic."""
     try:
-        prioritized_topic = await prioritization_service.process_topic(topic)
+        prioritized_topic = await request.app.state.svc.process_topic(topic)
         return {
             "status": "success",
             "topic": prioritized_topic
@@ -270,16 +685,33 @@ async def prioritize_topic(topic: TopicData):
         logger.error(f"Error in prioritize_topic endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/train")
-async def trigger_training():
-    """API endpoint to trigger model training."""
+@app.post("/prioritize_batch")
+async def prioritize_topics(topics: List[TopicData], request: Request):
+    """API endpoint to prioritize a batch of topics."""
     try:
-        await prioritization_service.train_model()
-        return {"status": "success", "message": "Model training completed"}
+        prioritized_topics = await request.app.state.svc.process_topics(topics)
+        return {
+            "status": "success",
+            "topics": prioritized_topics
+        }
     except Exception as e:
-        logger.error(f"Error in trigger_training endpoint: {str(e)}")
+        logger.error(f"Error in prioritize_topics endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/train", status_code=202)
+async def trigger_training(request: Request):
+    """API endpoint to start model training in the background."""
+    if not request.app.state.svc.start_training():
+        raise HTTPException(status_code=409, detail="Model training already in progress")
+    return {"status": "accepted", "message": "Model training started"}
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
+    uvicorn.run(
+        "src.main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv("WEB_CONCURRENCY", 2))
+    ) 
\ No newline at end of file
@@ -1,19 +1,32 @@
 import os
 import json
 import argparse
+import logging
 import tensorflow as tf
 from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
+try:
+    import tf2onnx
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+except ImportError:
+    tf2onnx = None
+    quantize_dynamic = None
 
-def create_model(input_dim: int) -> tf.keras.Model:
-    """Create the neural network model."""
+def create_model(X_train) -> tf.keras.Model:
+    """Create the neural network model, with feature scaling adapted to X_train."""
+    # Scaling lives inside the model so served predictions take raw features
+    normalizer = tf.keras.layers.Normalization(axis=-1)
+    normalizer.adapt(X_train)
+    
     model = tf.keras.Sequential([
-        tf.keras.layers.Dense(64, activation='relu', input_dim=input_dim),
+        tf.keras.Input(shape=(X_train.shape[1],)),
+        normalizer,
+        tf.keras.layers.Dense(64, activation='relu'),
         tf.keras.layers.Dropout(0.2),
         tf.keras.layers.Dense(32, activation='relu'),
         tf.keras.layers.Dropout(0.2),
         tf.keras.layers.Dense(16, activation='relu'),
-        tf.keras.layers.Dense(1, activation='sigmoid')
+        # Keep the output in float32 so the loss stays stable under mixed precision
+        tf.keras.layers.Dense(1, activation='sigmoid', dtype='float32')
     ])
     
     model.compile(
@@ -24,8 +37,19 @@ def create_model(input_dim: int) -> tf.keras.Model:
     
     return model
 
+def make_dataset(X, y, batch_size: int, shuffle: bool = False) -> tf.data.Dataset:
+    """Build a batched, prefetching input pipeline from in-memory arrays."""
+    dataset = tf.data.Dataset.from_tensor_slices((X, y))
+    if shuffle:
+        dataset = dataset.shuffle(min(len(X), 10000))
+    return dataset.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+
 def train_model(args):
     """Train the model with the provided data."""
+    # bfloat16 compute only pays off on CPUs/accelerators with native support
+    if args.mixed_precision:
+        tf.keras.mixed_precision.set_global_policy('mixed_bfloat16')
+    
     # Load and preprocess data
     X = args.dataset
     y = args.labels
@@ -37,13 +61,8 @@ def train_model(args):
         random_state=42
     )
     
-    # Scale features
-    scaler = StandardScaler()
-    X_train_scaled = scaler.fit_transform(X_train)
-    X_val_scaled = scaler.transform(X_val)
-    
     # Create and train model
-    model = create_model(X_train.shape[1])
+    model = create_model(X_train)
     
     # Add callbacks
     callbacks = [
@@ -59,38 +78,58 @@ def train_model(args):
         )
     ]
     
-    # Train the model
+    # Train the model, overlapping input batching with compute
     history = model.fit(
-        X_train_scaled,
-        y_train,
+        make_dataset(X_train, y_train, args.batch_size, shuffle=True),
         epochs=args.epochs,
-        batch_size=args.batch_size,
-        validation_data=(X_val_scaled, y_val),
+        validation_data=make_dataset(X_val, y_val, args.batch_size),
         callbacks=callbacks
     )
     
-    # Save the scaler
-    tf.saved_model.save(
-        scaler,
-        os.path.join(args.model_dir, 'scaler')
-    )
-    
     # Save training history
     with open(os.path.join(args.model_dir, 'history.json'), 'w') as f:
         json.dump(history.history, f)
     
     return model
 
+def export_onnx(model: tf.keras.Model, model_dir: str) -> None:
+    """Export the model to ONNX with int8 weights for in-process serving."""
+    if tf2onnx is None or quantize_dynamic is None:
+        logging.warning("tf2onnx/onnxruntime not installed, skipping ONNX export")
+        return
+    
+    onnx_path = os.path.join(model_dir, 'model.onnx')
+    input_signature = (
+        tf.TensorSpec((None, model.input_shape[-1]), tf.float32, name='input'),
+    )
+    tf2onnx.convert.from_keras(
+        model,
+        input_signature=input_signature,
+        opset=17,
+        output_path=onnx_path
+    )
+    
+    # Dynamic quantization stores weights as int8; activations stay float
+    quantize_dynamic(
+        onnx_path,
+        os.path.join(model_dir, 'model_int8.onnx'),
+        weight_type=QuantType.QInt8
+    )
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument('--model-dir', type=str, required=True)
     parser.add_argument('--epochs', type=int, default=10)
     parser.add_argument('--batch-size', type=int, default=32)
     parser.add_argument('--learning-rate', type=float, default=0.001)
+    parser.add_argument('--mixed-precision', action='store_true')
     
     args = parser.parse_args()
     
     model = train_model(args)
     
     # Save the final model
-    model.save(os.path.join(args.model_dir, 'model')) 
\ No newline at end of file
+    model.save(os.path.join(args.model_dir, 'model'))
+    
+    # Export a quantized copy for in-process scoring
+    export_onnx(model, args.model_dir) 
\ No newline at end of file
@@ -0,0 +1,15 @@
+from unittest.mock import patch
+
+_patchers = []
+
+def pytest_configure(config):
+    """Replace the Cloud Logging client main builds at import time."""
+    _patchers.append(patch('google.cloud.logging.Client'))
+    for patcher in _patchers:
+        patcher.start()
+
+def pytest_unconfigure(config):
+    """Restore the real client classes."""
+    for patcher in reversed(_patchers):
+        patcher.stop()
+    _patchers.clear()
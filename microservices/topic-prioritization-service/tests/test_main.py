@@ -0,0 +1,169 @@
+import asyncio
+import pytest
+import numpy as np
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from fastapi.testclient import TestClient
+
+from src.main import app, TopicPrioritizationService, TopicData
+
+@pytest.fixture
+def mock_config():
+    """Fixture for mock service configuration."""
+    return {
+        'pubsub': {
+            'output_topic': 'projects/test-project/topics/prioritized-topics'
+        },
+        'model': {
+            'vertex_ai': {
+                'endpoint_name': 'test-endpoint',
+                'region': 'us-central1'
+            },
+            'onnx': {}
+        },
+        'scoring': {
+            'weights': {
+                'search_volume': 0.3,
+                'competition': 0.2,
+                'trend_score': 0.3,
+                'hitl_feedback': 0.2
+            },
+            'thresholds': {
+                'min_priority_score': 0.6
+            }
+        },
+        'data_sources': {
+            'bigquery': {
+                'dataset': 'test_dataset',
+                'tables': {
+                    'search_data': 'search_metrics',
+                    'feedback': 'hitl_feedback',
+                    'historical': 'historical_topics'
+                }
+            }
+        }
+    }
+
+def fake_query_rows(query, job_config):
+    """Return one enrichment row per queried term, as BigQuery would."""
+    parameter = job_config.query_parameters[0]
+    terms = parameter.values if parameter.name == 'terms' else [parameter.value]
+    return [
+        SimpleNamespace(term=term, search_volume=1.0, competition=0.0, hitl_score=1.0)
+        for term in terms
+    ]
+
+@pytest.fixture
+def service(mock_config):
+    """Service with mocked config, BigQuery and Pub/Sub and no scoring model."""
+    with patch.object(TopicPrioritizationService, '_load_config', return_value=mock_config):
+        service = TopicPrioritizationService()
+    service.publisher = MagicMock()
+    service._run_query = MagicMock(side_effect=fake_query_rows)
+    return service
+
+@pytest.fixture
+def client(service):
+    """Test client serving the mocked service; the lifespan is not run."""
+    app.state.svc = service
+    return TestClient(app)
+
+def make_topic(term, score=0.5):
+    return {
+        'term': term,
+        'score': score,
+        'metadata': {'source': 'test'},
+        'timestamp': datetime(2024, 1, 1).isoformat()
+    }
+
+def test_feature_weights_use_hitl_feedback_key(service):
+    """Test the hitl_score feature is weighted by the hitl_feedback config entry."""
+    np.testing.assert_allclose(service.feature_weights, [0.3, 0.2, 0.3, 0.2])
+
+def test_prioritize_batch_endpoint(client, service):
+    """Test a batch is enriched with one query, scored and published above threshold."""
+    response = client.post('/prioritize_batch', json=[make_topic('ai', 1.0), make_topic('ml', 0.0)])
+
+    assert response.status_code == 200
+    topics = response.json()['topics']
+    assert [topic['term'] for topic in topics] == ['ai', 'ml']
+    # 0.3 * search_volume + 0.2 * competition + 0.3 * trend + 0.2 * hitl
+    assert topics[0]['priority_score'] == pytest.approx(0.8)
+    assert topics[1]['priority_score'] == pytest.approx(0.5)
+    assert topics[0]['metadata']['priority_factors']['hitl_score'] == 1.0
+    service._run_query.assert_called_once()
+    # Only the topic above min_priority_score is published
+    service.publisher.publish.assert_called_once()
+
+def test_prioritize_batch_endpoint_empty(client, service):
+    """Test an empty batch returns no topics without querying BigQuery."""
+    response = client.post('/prioritize_batch', json=[])
+
+    assert response.status_code == 200
+    assert response.json()['topics'] == []
+    service._run_query.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_enrichment_cache(service):
+    """Test repeated terms are served from the enrichment cache."""
+    topic = TopicData(**make_topic('ai'))
+
+    first = await service._enrich_topic_data(topic)
+    second = await service._enrich_topic_data(topic)
+
+    assert first == second
+    service._run_query.assert_called_once()
+    assert service.term_hits['ai'] == 2
+
+@pytest.mark.asyncio
+async def test_batch_enrichment_queries_only_uncached_terms(service):
+    """Test a batch only sends cache misses to BigQuery."""
+    await service._enrich_topic_data(TopicData(**make_topic('ai')))
+    service._run_query.reset_mock()
+
+    await service._enrich_topic_data_batch([
+        TopicData(**make_topic('ai')),
+        TopicData(**make_topic('ml'))
+    ])
+
+    service._run_query.assert_called_once()
+    (_, job_config), _ = service._run_query.call_args
+    assert job_config.query_parameters[0].values == ['ml']
+
+def test_lifespan_starts_without_vertex(mock_config):
+    """Test the app starts and serves fallback scores when Vertex AI is unreachable."""
+    mock_config['model']['vertex_ai']['init_attempts'] = 1
+    with patch.object(TopicPrioritizationService, '_load_config', return_value=mock_config), \
+         patch.object(TopicPrioritizationService, '_initialize_vertex_ai', side_effect=RuntimeError("unreachable")):
+        with TestClient(app) as lifespan_client:
+            service = app.state.svc
+            service.publisher = MagicMock()
+            service._run_query = MagicMock(side_effect=fake_query_rows)
+
+            response = lifespan_client.post('/prioritize_batch', json=[make_topic('ai', 1.0)])
+
+            assert response.status_code == 200
+            assert response.json()['topics'][0]['priority_score'] == pytest.approx(0.8)
+            assert service.model_endpoint is None
+
+@pytest.mark.asyncio
+async def test_start_training_runs_one_job_at_a_time(service):
+    """Test training runs in the background and overlapping triggers are refused."""
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def train_model():
+        started.set()
+        await release.wait()
+
+    service.train_model = train_model
+
+    assert service.start_training()
+    await started.wait()
+    assert not service.start_training()
+
+    release.set()
+    await service._training_task
+    assert service.start_training()
+    await service._training_task
@@ -0,0 +1,42 @@
+from typing import Any, Dict, List
+
+from moviepy.editor import AudioFileClip, ImageSequenceClip
+
+def encode_video(
+    image_paths: List[str],
+    voice_over_path: str,
+    output_path: str,
+    fps: int,
+    codec: str,
+    encoder_options: Dict[str, Any]
+) -> str:
+    """Mux the image sequence with the voice-over into output_path.
+
+    Runs in a worker process, so it lives apart from main and only imports MoviePy.
+    """
+    # Create video from images
+    clip = ImageSequenceClip(image_paths, fps=fps)
+    
+    # Load the audio file
+    audio = AudioFileClip(voice_over_path)
+    
+    # Set the video duration to match the audio duration
+    video = clip.set_duration(audio.duration)
+    
+    # Combine video with audio
+    final_clip = video.set_audio(audio)
+    
+    # Write the final video file
+    final_clip.write_videofile(
+        output_path,
+        codec=codec,
+        audio_codec='aac',
+        **encoder_options
+    )
+    
+    # Close the clips to free up resources
+    final_clip.close()
+    audio.close()
+    clip.close()
+
+    return output_path
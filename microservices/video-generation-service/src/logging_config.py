@@ -1,8 +1,18 @@
+import functools
 import logging
 import google.cloud.logging
 from google.cloud.logging.handlers import CloudLoggingHandler
+from google.cloud.logging_v2.handlers.transports import BackgroundThreadTransport
+from pythonjsonlogger import jsonlogger
 import os
 
+# Loggers kept off Cloud Logging: the client's own transport (which would
+# recurse) and chatty library internals
+EXCLUDED_LOGGERS = ("google.cloud", "google.auth", "google_auth_httplib2", "urllib3", "asyncio")
+
+def _not_excluded(record: logging.LogRecord) -> bool:
+    return not record.name.startswith(EXCLUDED_LOGGERS)
+
 def setup_logging():
     """Set up logging configuration for both local and cloud logging."""
     # Create logger
@@ -16,9 +26,11 @@ def setup_logging():
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.INFO)
     
-    # Create formatter
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    # Emit structured JSON records; the log collector timestamps each line,
+    # so skip per-record asctime formatting and map the level to severity
+    formatter = jsonlogger.JsonFormatter(
+        '%(name)s %(levelname)s %(message)s',
+        rename_fields={'levelname': 'severity'}
     )
     console_handler.setFormatter(formatter)
     
@@ -29,9 +41,20 @@ def setup_logging():
     if os.getenv('GOOGLE_APPLICATION_CREDENTIALS'):
         try:
             client = google.cloud.logging.Client()
-            cloud_handler = CloudLoggingHandler(client)
+            # No formatter: the handler sends structured entries and Cloud
+            # Logging assigns timestamps on ingestion. Records are queued and
+            # shipped from a background thread in batches of up to 100.
+            cloud_handler = CloudLoggingHandler(
+                client,
+                transport=functools.partial(BackgroundThreadTransport, batch_size=100)
+            )
             cloud_handler.setLevel(logging.INFO)
+            cloud_handler.addFilter(_not_excluded)
             logger.addHandler(cloud_handler)
+            
+            # Optionally make Cloud Logging the only sink and drop the console copy
+            if os.getenv('LOG_CLOUD_ONLY', '').lower() in ('1', 'true'):
+                logger.removeHandler(console_handler)
             logger.info("Google Cloud Logging initialized")
         except Exception as e:
             logger.warning(f"Failed to initialize Google Cloud Logging: {str(e)}")
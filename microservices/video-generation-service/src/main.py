@@ -1,19 +1,26 @@
 from fastapi import FastAPI, WebSocket, BackgroundTasks, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Literal
 import google.generativeai as genai
 from google.cloud import texttospeech, storage
 import logging
 import json
+import orjson
+import functools
+import subprocess
 import os
 import uuid
 import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import colorsys
 from PIL import Image
 import io
 import tempfile
 import ffmpeg
-from moviepy.editor import VideoFileClip, AudioFileClip, ImageSequenceClip
+from moviepy.config import get_setting
+from encoding import encode_video
 
 # Initialize logging
 logging.basicConfig(level=logging.INFO)
@@ -31,9 +38,30 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# MoviePy fills ffmpeg's stdin from a Python loop under the GIL; encode in separate
+# processes so long encodes don't stall other requests. Spawned, not forked, so
+# workers don't inherit the parent's gRPC channels.
+ENC_POOL = ProcessPoolExecutor(
+    max_workers=max(1, (os.cpu_count() or 1) // 2),
+    mp_context=multiprocessing.get_context("spawn")
+)
+
 # Store active WebSocket connections
 active_connections: Dict[str, WebSocket] = {}
 
+# Pre-encoded WebSocket frames for the fixed pipeline milestones
+PROGRESS_FRAMES = {
+    (progress, status): orjson.dumps({"progress": progress, "status": status, "error": None}).decode()
+    for progress, status in [
+        (0, "starting"),
+        (20, "script_generated"),
+        (40, "voice_generated"),
+        (60, "images_generated"),
+        (80, "video_created"),
+        (100, "completed")
+    ]
+}
+
 # Initialize Google AI
 genai.configure(api_key=os.getenv('GOOGLE_AI_API_KEY'))
 model = genai.GenerativeModel('gemini-pro')
@@ -50,13 +78,79 @@ class VideoRequest(BaseModel):
     width: int = Field(default=1920)
     height: int = Field(default=1080)
     fps: int = Field(default=30)
+    codec: Literal['h264', 'h265'] = 'h264'
+
+# Google clients hold auth state and channels; build each once per process
+@functools.lru_cache(maxsize=1)
+def get_storage_client() -> storage.Client:
+    return storage.Client()
+
+@functools.lru_cache(maxsize=1)
+def get_tts_client() -> texttospeech.TextToSpeechClient:
+    return texttospeech.TextToSpeechClient()
+
+# ffmpeg encoders per requested codec, hardware first
+NVENC_ENCODERS = {'h264': 'h264_nvenc', 'h265': 'hevc_nvenc'}
+SOFTWARE_ENCODERS = {'h264': 'libx264', 'h265': 'libx265'}
+
+@functools.lru_cache(maxsize=None)
+def select_video_codec(video_codec: str = 'h264') -> str:
+    # Probe once per process: NVENC is only usable if ffmpeg can open it on a GPU here.
+    # Use MoviePy's own binary (imageio-ffmpeg's by default), not whatever is on PATH.
+    try:
+        subprocess.run(
+            [
+                get_setting('FFMPEG_BINARY'), '-hide_banner', '-loglevel', 'error',
+                '-f', 'lavfi', '-i', 'color=size=256x256',
+                '-frames:v', '1', '-c:v', NVENC_ENCODERS[video_codec], '-f', 'null', '-'
+            ],
+            check=True,
+            capture_output=True,
+            timeout=30
+        )
+        return NVENC_ENCODERS[video_codec]
+    except (OSError, subprocess.SubprocessError):
+        return SOFTWARE_ENCODERS[video_codec]
 
 class VideoGenerationService:
     def __init__(self):
-        self.storage_client = storage.Client()
-        self.tts_client = texttospeech.TextToSpeechClient()
+        self.storage_client = get_storage_client()
+        self.tts_client = get_tts_client()
         self.bucket_name = os.getenv('GOOGLE_CLOUD_STORAGE_BUCKET', 'your-bucket-name')
 
+    @staticmethod
+    def _encoder_options(codec: str, fps: int) -> Dict[str, Any]:
+        # logger=None drops MoviePy's per-frame progress bar
+        if codec in NVENC_ENCODERS.values():
+            # MoviePy only sets yuv420p for libx264; keep NVENC output browser-playable
+            ffmpeg_params = ['-tune', 'll', '-rc', 'vbr', '-b:v', '8M', '-pix_fmt', 'yuv420p']
+            if codec == 'hevc_nvenc':
+                ffmpeg_params += ['-tag:v', 'hvc1']
+            return {'preset': 'p4', 'ffmpeg_params': ffmpeg_params, 'logger': None}
+        if codec == 'libx265':
+            # Wavefront, mode and motion-estimation parallelism within each frame;
+            # x265 caps frame threads at 16
+            frame_threads = min(os.cpu_count() or 1, 16)
+            return {
+                'preset': 'ultrafast',
+                'ffmpeg_params': [
+                    '-x265-params', f'wpp=1:pmode=1:pme=1:frame-threads={frame_threads}',
+                    '-pix_fmt', 'yuv420p',
+                    '-tag:v', 'hvc1'
+                ],
+                'logger': None
+            }
+        return {
+            'preset': 'ultrafast',
+            'threads': os.cpu_count(),
+            'ffmpeg_params': [
+                '-tune', 'zerolatency',
+                '-x264-params', 'sliced-threads=1',
+                '-g', str(fps * 2)
+            ],
+            'logger': None
+        }
+
     async def generate_script(self, prompt: str, style: str, target_audience: str) -> str:
         try:
             prompt_template = f"""
@@ -83,7 +177,8 @@ class VideoGenerationService:
                 audio_encoding=texttospeech.AudioEncoding.MP3
             )
 
-            response = self.tts_client.synthesize_speech(
+            response = await asyncio.to_thread(
+                self.tts_client.synthesize_speech,
                 input=synthesis_input,
                 voice=voice,
                 audio_config=audio_config
@@ -94,43 +189,62 @@ class VideoGenerationService:
             logger.error(f"Voice-over generation error: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Voice-over generation failed: {str(e)}")
 
-    async def generate_images(self, script: str, num_images: int = 5) -> List[str]:
+    async def generate_images(self, script: str, task_id: str, num_images: int = 5) -> List[str]:
         try:
-            # For now, create placeholder images
-            image_paths = []
-            for i in range(num_images):
-                img = Image.new('RGB', (1920, 1080), color=f'hsl({i * 360 / num_images}, 50%, 50%)')
-                temp_path = f"/tmp/image_{i}.jpg"
-                img.save(temp_path)
-                image_paths.append(temp_path)
+            # For now, create placeholder images; resolve the hues to RGB up front
+            # so each fill is a plain memset rather than a parsed color string
+            colors = [
+                tuple(int(c * 255 + 0.5) for c in colorsys.hls_to_rgb(i / num_images, 0.5, 0.5))
+                for i in range(num_images)
+            ]
+            # Per-task paths: concurrent requests must not overwrite frames MoviePy is still reading
+            image_paths = [f"/tmp/{task_id}_image_{i}.jpg" for i in range(num_images)]
+            
+            def save_placeholder(color, temp_path):
+                Image.new('RGB', (1920, 1080), color=color).save(temp_path)
+            
+            # Pillow releases the GIL while encoding, so the JPEGs are written in parallel
+            await asyncio.gather(*(
+                asyncio.to_thread(save_placeholder, color, temp_path)
+                for color, temp_path in zip(colors, image_paths)
+            ))
             return image_paths
         except Exception as e:
             logger.error(f"Image generation error: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Image generation failed: {str(e)}")
 
-    async def create_video(self, image_paths: List[str], voice_over_path: str, output_path: str, fps: int) -> str:
+    async def create_video(
+        self,
+        image_paths: List[str],
+        voice_over_path: str,
+        output_path: str,
+        fps: int,
+        video_codec: str = 'h264'
+    ) -> str:
         try:
-            # Create video from images
-            clip = ImageSequenceClip(image_paths, fps=fps)
-            
-            # Load the audio file
-            audio = AudioFileClip(voice_over_path)
+            codec = await asyncio.to_thread(select_video_codec, video_codec)
+            loop = asyncio.get_running_loop()
             
-            # Set the video duration to match the audio duration
-            video = clip.set_duration(audio.duration)
+            def encode(codec: str):
+                return loop.run_in_executor(
+                    ENC_POOL,
+                    encode_video,
+                    image_paths,
+                    voice_over_path,
+                    output_path,
+                    fps,
+                    codec,
+                    self._encoder_options(codec, fps)
+                )
             
-            # Combine video with audio
-            final_clip = video.set_audio(audio)
-            
-            # Write the final video file
-            final_clip.write_videofile(output_path, codec='libx264', audio_codec='aac')
-            
-            # Close the clips to free up resources
-            final_clip.close()
-            audio.close()
-            clip.close()
-
-            return output_path
+            try:
+                return await encode(codec)
+            except Exception as e:
+                if codec not in NVENC_ENCODERS.values():
+                    raise
+                # The probe passed but the real encode didn't; redo it in software
+                logger.warning(f"{codec} encode failed, falling back to software: {str(e)}")
+                return await encode(SOFTWARE_ENCODERS[video_codec])
         except Exception as e:
             logger.error(f"Video creation error: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Video creation failed: {str(e)}")
@@ -139,22 +253,36 @@ class VideoGenerationService:
         try:
             bucket = self.storage_client.bucket(self.bucket_name)
             blob_name = f"videos/{task_id}/output.mp4"
-            blob = bucket.blob(blob_name)
+            # A chunk size makes this a resumable upload streamed from disk in 8 MB parts
+            blob = bucket.blob(blob_name, chunk_size=8 * 1024 * 1024)
             
-            blob.upload_from_filename(file_path)
+            await asyncio.to_thread(
+                blob.upload_from_filename,
+                file_path,
+                content_type="video/mp4",
+                timeout=300
+            )
             
             return blob.public_url
         except Exception as e:
             logger.error(f"Upload error: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
+@functools.lru_cache(maxsize=1)
+def get_service() -> VideoGenerationService:
+    return VideoGenerationService()
+
+def write_file(path: str, data: bytes) -> None:
+    with open(path, "wb") as f:
+        f.write(data)
+
 async def update_progress(websocket: WebSocket, progress: float, status: str, error: Optional[str] = None):
     try:
-        await websocket.send_json({
-            "progress": progress,
-            "status": status,
-            "error": error
-        })
+        # Text frames: the client JSON.parses event.data
+        frame = PROGRESS_FRAMES.get((progress, status)) if error is None else None
+        if frame is None:
+            frame = orjson.dumps({"progress": progress, "status": status, "error": error}).decode()
+        await websocket.send_text(frame)
     except Exception as e:
         logger.error(f"WebSocket update error: {str(e)}")
 
@@ -171,7 +299,7 @@ async def websocket_endpoint(websocket: WebSocket, task_id: str):
 
 @app.post("/generate")
 async def generate_video(request: VideoRequest, background_tasks: BackgroundTasks):
-    service = VideoGenerationService()
+    service = get_service()
     
     try:
         # Update initial status
@@ -183,22 +311,35 @@ async def generate_video(request: VideoRequest, background_tasks: BackgroundTask
         if request.taskId in active_connections:
             await update_progress(active_connections[request.taskId], 20, "script_generated", None)
 
-        # Generate voice-over
-        voice_over = await service.generate_voice_over(script)
+        # Voice-over and images depend only on the script, so generate them concurrently
         voice_over_path = f"/tmp/{request.taskId}_voice.mp3"
-        with open(voice_over_path, "wb") as f:
-            f.write(voice_over)
+
+        async def generate_voice_stage():
+            voice_over = await service.generate_voice_over(script)
+            await asyncio.to_thread(write_file, voice_over_path, voice_over)
+
+        voice_task = asyncio.ensure_future(generate_voice_stage())
+        images_task = asyncio.ensure_future(service.generate_images(script, request.taskId))
+        done, pending = await asyncio.wait(
+            [voice_task, images_task],
+            return_when=asyncio.FIRST_EXCEPTION
+        )
+        # If one stage failed, stop the other instead of letting it write files for a dead task
+        for task in pending:
+            task.cancel()
+        for task in done:
+            task.result()
+        image_paths = images_task.result()
+
+        # Report the milestones in order, whichever stage finished first
         if request.taskId in active_connections:
             await update_progress(active_connections[request.taskId], 40, "voice_generated", None)
-
-        # Generate images
-        image_paths = await service.generate_images(script)
         if request.taskId in active_connections:
             await update_progress(active_connections[request.taskId], 60, "images_generated", None)
 
         # Create video
         output_path = f"/tmp/{request.taskId}_output.mp4"
-        await service.create_video(image_paths, voice_over_path, output_path, request.fps)
+        await service.create_video(image_paths, voice_over_path, output_path, request.fps, request.codec)
         if request.taskId in active_connections:
             await update_progress(active_connections[request.taskId], 80, "video_created", None)
 
@@ -208,10 +349,10 @@ async def generate_video(request: VideoRequest, background_tasks: BackgroundTask
             await update_progress(active_connections[request.taskId], 100, "completed", None)
 
         # Clean up temporary files
-        os.remove(voice_over_path)
-        os.remove(output_path)
-        for path in image_paths:
-            os.remove(path)
+        await asyncio.gather(*(
+            asyncio.to_thread(os.remove, path)
+            for path in [voice_over_path, output_path, *image_paths]
+        ))
 
         return {"status": "success", "videoUrl": video_url}
     except Exception as e:
@@ -221,6 +362,10 @@ async def generate_video(request: VideoRequest, background_tasks: BackgroundTask
             await update_progress(active_connections[request.taskId], 0, "failed", error_message)
         raise HTTPException(status_code=500, detail=error_message)
 
+@app.on_event("shutdown")
+def shutdown_encoders():
+    ENC_POOL.shutdown(wait=True)
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"} 
\ No newline at end of file
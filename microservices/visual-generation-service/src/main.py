@@ -1,15 +1,25 @@
 import os
+import copy
 import json
+import orjson
 import asyncio
+from concurrent import futures
+import functools
+import random
+import struct
+import time
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple, AsyncIterator
 from fastapi import FastAPI, HTTPException, BackgroundTasks
-from pydantic import BaseModel, Field
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ConfigDict, Field
 import stability_sdk.interfaces.gooseai.generation.generation_pb2 as generation
 from stability_sdk import client
 import replicate
-from google.cloud import storage, vision, pubsub_v1
+import httpx
+from google.cloud import storage, pubsub_v1
 from PIL import Image
+from cachetools import TTLCache
 import io
 import logging
 from logging_config import setup_logging, get_logger
@@ -18,20 +28,65 @@ from logging_config import setup_logging, get_logger
 setup_logging()
 logger = get_logger(__name__)
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 
 class ImageRequest(BaseModel):
     """Request model for image generation."""
+    model_config = ConfigDict(extra='forbid')
+
     prompt: str = Field(..., min_length=1, max_length=1000)
     style: Optional[str] = Field(default="realistic")
     width: int = Field(default=1024, ge=512, le=2048)
     height: int = Field(default=1024, ge=512, le=2048)
     num_images: int = Field(default=1, ge=1, le=4)
 
+@functools.lru_cache(maxsize=4)
+def _load_config_cached(config_path: str) -> Dict[str, Any]:
+    """Parse a config file once per process; shared, so copy before use."""
+    with open(config_path) as f:
+        return json.load(f)
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# Resumable upload chunk for streamed images (GCS requires multiples of 256 KiB)
+IMAGE_UPLOAD_CHUNK_SIZE = 256 * 1024
+
+# (epoch second, ISO timestamp, filename timestamp), swapped as one tuple
+_timestamp_cache: Tuple[int, str, str] = (-1, '', '')
+
+def _utc_timestamps() -> Tuple[str, str]:
+    """Return the current UTC second as ISO and filename strings, formatted once per second."""
+    global _timestamp_cache
+    now = int(time.time())
+    cache = _timestamp_cache
+    if cache[0] != now:
+        moment = datetime.utcfromtimestamp(now)
+        cache = (now, moment.isoformat(), moment.strftime('%Y%m%d_%H%M%S'))
+        _timestamp_cache = cache
+    return cache[1], cache[2]
+
+def iso_now() -> str:
+    """Current UTC time in ISO format at second resolution."""
+    return _utc_timestamps()[0]
+
 class VisualGenerationService:
     def __init__(self):
         self._load_config()
         self._initialize_clients()
+
+        # Stored image URLs by request; identical prompts skip inference and uploads
+        cache_config = self.config.get('cache', {})
+        self.image_cache = TTLCache(
+            maxsize=cache_config.get('max_entries', 512),
+            ttl=cache_config.get('ttl_seconds', 86400)
+        ) if cache_config.get('enabled', False) else None
+
+        # Quality limits are read on every image check; resolve them once
+        quality = self.config['quality']
+        self._min_w = quality['min_resolution']['width']
+        self._min_h = quality['min_resolution']['height']
+        self._max_bytes = quality['max_file_size_mb'] * 1024 * 1024
+        self._required_formats = frozenset(f.lower() for f in quality['required_formats'])
         logger.info("Visual Generation Service initialized")
 
     def _load_config(self) -> Dict[str, Any]:
@@ -40,10 +95,16 @@ class VisualGenerationService:
             os.path.dirname(__file__),
             '../config/visual-generation-config.json'
         )
-        with open(config_path) as f:
-            self.config = json.load(f)
+        # Each instance gets its own copy so config changes don't leak between instances
+        self.config = copy.deepcopy(_load_config_cached(config_path))
         return self.config
 
+    @functools.cached_property
+    def vision_client(self):
+        """Vision API client, built on first use; its gRPC stubs are costly to load."""
+        from google.cloud import vision
+        return vision.ImageAnnotatorClient()
+
     def _initialize_clients(self):
         """Initialize API clients."""
         # Initialize Stability AI client
@@ -61,22 +122,51 @@ class VisualGenerationService:
 
         # Initialize Google Cloud clients
         self.storage_client = storage.Client()
-        self.vision_client = vision.ImageAnnotatorClient()
-        self.publisher = pubsub_v1.PublisherClient()
+        # Coalesce concurrent result publishes into batched RPCs
+        self.publisher = pubsub_v1.PublisherClient(
+            batch_settings=pubsub_v1.types.BatchSettings(
+                max_messages=100,
+                max_bytes=1024 * 1024,
+                max_latency=0.01
+            )
+        )
+        self._topic_path = self.publisher.topic_path(
+            os.getenv('GOOGLE_CLOUD_PROJECT'),
+            self.config['pubsub']['output_topic']
+        )
+        self._pending_publishes = set()
+
+        # Filename suffixes only need uniqueness, not a kernel RNG call per image
+        self._rng = random.Random(os.urandom(16))
+
+        # Pooled keep-alive client for downloading generated images
+        self.http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+            timeout=httpx.Timeout(30.0)
+        )
 
     async def generate_images(self, request: ImageRequest) -> List[Dict[str, Any]]:
         """Generate images based on the request."""
+        cache_key = (request.prompt, request.style, request.width, request.height, request.num_images)
+        if self.image_cache is not None:
+            images = self.image_cache.get(cache_key)
+            if images is not None:
+                logger.info("Serving images for repeated request from cache")
+                return images
+
         try:
             # Try Stability AI first
             if self.config['generation']['stability_ai']['enabled']:
                 images = await self._generate_with_stability(request)
                 if images:
+                    self._cache_images(cache_key, images)
                     return images
 
             # Fallback to Replicate
             if self.config['generation']['replicate']['enabled']:
                 images = await self._generate_with_replicate(request)
                 if images:
+                    self._cache_images(cache_key, images)
                     return images
 
             raise Exception("All image generation attempts failed")
@@ -88,6 +178,30 @@ class VisualGenerationService:
                 detail=f"Image generation failed: {str(e)}"
             )
 
+    def _cache_images(self, cache_key: Tuple[Any, ...], images: List[Dict[str, Any]]) -> None:
+        """Remember the stored images for a request, if caching is enabled."""
+        if self.image_cache is not None:
+            self.image_cache[cache_key] = images
+
+    @staticmethod
+    def _image_results(request: ImageRequest, urls: List[str], model: str) -> List[Dict[str, Any]]:
+        """Pair stored image URLs with their generation metadata."""
+        # Request fields are shared by every image; only the timestamp varies
+        base_metadata = {
+            'prompt': request.prompt,
+            'style': request.style,
+            'width': request.width,
+            'height': request.height,
+            'model': model,
+        }
+
+        images = []
+        for url in urls:
+            metadata = base_metadata.copy()
+            metadata['generated_at'] = iso_now()
+            images.append({'url': url, 'metadata': metadata})
+        return images
+
     async def _generate_with_stability(self, request: ImageRequest) -> List[Dict[str, Any]]:
         """Generate images using Stability AI."""
         try:
@@ -100,29 +214,21 @@ class VisualGenerationService:
                 cfg_scale=self.config['generation']['stability_ai']['cfg_scale'],
             )
 
-            images = []
+            image_datas = []
             for resp in answers:
                 for artifact in resp.artifacts:
                     if artifact.finish_reason == generation.FILTER:
                         logger.warning("Content filtered by safety system")
                         continue
 
-                    image_data = artifact.binary
-                    image_url = await self._save_image(image_data)
-                    
-                    images.append({
-                        'url': image_url,
-                        'metadata': {
-                            'prompt': request.prompt,
-                            'style': request.style,
-                            'width': request.width,
-                            'height': request.height,
-                            'generated_at': datetime.utcnow().isoformat(),
-                            'model': 'stability-ai',
-                        }
-                    })
-
-            return images
+                    image_datas.append(artifact.binary)
+
+            # Upload all accepted images concurrently
+            image_urls = await asyncio.gather(*[
+                self._save_image(image_data) for image_data in image_datas
+            ])
+
+            return self._image_results(request, image_urls, 'stability-ai')
 
         except Exception as e:
             logger.error(f"Stability AI generation failed: {str(e)}")
@@ -142,57 +248,74 @@ class VisualGenerationService:
                 }
             )
 
-            images = []
-            for image_url in output:
-                # Download image from Replicate URL
-                async with httpx.AsyncClient() as client:
-                    response = await client.get(image_url)
-                    image_data = response.content
-
-                # Save to our storage
-                final_url = await self._save_image(image_data)
-                
-                images.append({
-                    'url': final_url,
-                    'metadata': {
-                        'prompt': request.prompt,
-                        'style': request.style,
-                        'width': request.width,
-                        'height': request.height,
-                        'generated_at': datetime.utcnow().isoformat(),
-                        'model': 'replicate',
-                    }
-                })
-
-            return images
+            # Stream each image from Replicate straight into our storage, concurrently
+            final_urls = await asyncio.gather(*[
+                self._transfer_image(image_url) for image_url in output
+            ])
+
+            return self._image_results(request, final_urls, 'replicate')
 
         except Exception as e:
             logger.error(f"Replicate generation failed: {str(e)}")
             return []
 
-    async def _save_image(self, image_data: bytes) -> str:
-        """Save image to Cloud Storage and return public URL."""
+    def _new_image_blob(self) -> storage.Blob:
+        """Create a blob with a unique image filename."""
+        # Create unique filename
+        timestamp = _utc_timestamps()[1]
+        filename = f"{timestamp}_{self._rng.getrandbits(32):08x}.png"
+        blob_name = os.path.join(
+            self.config['storage']['images_prefix'],
+            filename
+        )
+
+        # Get bucket
+        bucket = self.storage_client.bucket(self.config['storage']['bucket'])
+        return bucket.blob(blob_name)
+
+    async def _transfer_image(self, image_url: str) -> str:
+        """Stream a remote image into Cloud Storage and return its public URL."""
+        async with self.http_client.stream('GET', image_url) as response:
+            response.raise_for_status()
+            return await self._save_image_stream(response.aiter_bytes())
+
+    async def _save_image_stream(self, chunks: AsyncIterator[bytes]) -> str:
+        """Save streamed image bytes to Cloud Storage and return public URL."""
         try:
-            # Create unique filename
-            timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
-            filename = f"{timestamp}_{os.urandom(4).hex()}.png"
-            blob_name = os.path.join(
-                self.config['storage']['images_prefix'],
-                filename
+            blob = self._new_image_blob()
+
+            # Resumable upload: only one chunk is buffered, whatever the image size.
+            # Not closed on failure, so a partial image is never finalized.
+            writer = blob.open(
+                'wb',
+                chunk_size=IMAGE_UPLOAD_CHUNK_SIZE,
+                content_type='image/png',
+                predefined_acl='publicRead'
             )
+            async for chunk in chunks:
+                await asyncio.to_thread(writer.write, chunk)
+            await asyncio.to_thread(writer.close)
+
+            return blob.public_url
+
+        except Exception as e:
+            logger.error(f"Error saving image: {str(e)}")
+            raise
 
-            # Get bucket
-            bucket = self.storage_client.bucket(self.config['storage']['bucket'])
-            blob = bucket.blob(blob_name)
+    async def _save_image(self, image_data: bytes) -> str:
+        """Save image to Cloud Storage and return public URL."""
+        try:
+            blob = self._new_image_blob()
 
-            # Upload image
-            blob.upload_from_string(
+            # Upload image as publicly readable in the same request, off the event loop
+            await asyncio.to_thread(
+                blob.upload_from_string,
                 image_data,
-                content_type='image/png'
+                content_type='image/png',
+                predefined_acl='publicRead'
             )
 
-            # Make public and return URL
-            blob.make_public()
+            # public_url is built locally from the bucket and blob names
             return blob.public_url
 
         except Exception as e:
@@ -202,26 +325,29 @@ class VisualGenerationService:
     async def _check_image_quality(self, image_data: bytes) -> bool:
         """Check if image meets quality requirements."""
         try:
-            image = Image.open(io.BytesIO(image_data))
+            # PNG carries its size in the fixed-offset IHDR chunk; read it directly.
+            # Otherwise let Pillow parse the header only (open() is lazy; never load()).
+            if image_data[:8] == PNG_SIGNATURE and len(image_data) >= 24:
+                width, height = struct.unpack('>II', image_data[16:24])
+                image_format = 'PNG'
+            else:
+                image = Image.open(io.BytesIO(image_data))
+                width, height = image.size
+                image_format = image.format
             
             # Check resolution
-            width, height = image.size
-            min_width = self.config['quality']['min_resolution']['width']
-            min_height = self.config['quality']['min_resolution']['height']
-            
-            if width < min_width or height < min_height:
-                logger.warning(f"Image resolution {width}x{height} below minimum {min_width}x{min_height}")
+            if width < self._min_w or height < self._min_h:
+                logger.warning(f"Image resolution {width}x{height} below minimum {self._min_w}x{self._min_h}")
                 return False
 
             # Check file size
-            image_size = len(image_data) / (1024 * 1024)  # Convert to MB
-            if image_size > self.config['quality']['max_file_size_mb']:
-                logger.warning(f"Image size {image_size}MB exceeds maximum {self.config['quality']['max_file_size_mb']}MB")
+            if len(image_data) > self._max_bytes:
+                logger.warning(f"Image size {len(image_data)} bytes exceeds maximum {self._max_bytes} bytes")
                 return False
 
             # Check format
-            if image.format.lower() not in self.config['quality']['required_formats']:
-                logger.warning(f"Image format {image.format} not in required formats")
+            if image_format.lower() not in self._required_formats:
+                logger.warning(f"Image format {image_format} not in required formats")
                 return False
 
             return True
@@ -233,19 +359,33 @@ class VisualGenerationService:
     async def publish_result(self, result: Dict[str, Any]) -> None:
         """Publish generation result to Pub/Sub."""
         try:
-            topic_path = self.publisher.topic_path(
-                os.getenv('GOOGLE_CLOUD_PROJECT'),
-                self.config['pubsub']['output_topic']
-            )
+            data = orjson.dumps(result)
+            future = self.publisher.publish(self._topic_path, data)
 
-            data = json.dumps(result).encode('utf-8')
-            future = self.publisher.publish(topic_path, data)
-            await asyncio.wrap_future(future)
+            # Don't wait for the ack; failures are logged from the callback
+            self._pending_publishes.add(future)
+            future.add_done_callback(self._on_publish_done)
 
         except Exception as e:
             logger.error(f"Error publishing result: {str(e)}")
             raise
 
+    def _on_publish_done(self, future: futures.Future) -> None:
+        """Stop tracking a completed publish, logging it if it failed."""
+        self._pending_publishes.discard(future)
+        exception = future.exception()
+        if exception is not None:
+            logger.error(f"Error publishing result: {str(exception)}")
+
+    async def flush(self) -> None:
+        """Wait for all queued publishes to complete."""
+        pending = list(self._pending_publishes)
+        if not pending:
+            return
+
+        await asyncio.to_thread(futures.wait, pending)
+        logger.info(f"Flushed {len(pending)} queued publishes")
+
 # Initialize service
 service = VisualGenerationService()
 
@@ -264,7 +404,7 @@ async def generate_images(
             'metadata': {
                 'prompt': request.prompt,
                 'style': request.style,
-                'generated_at': datetime.utcnow().isoformat(),
+                'generated_at': iso_now(),
             }
         }
 
@@ -280,6 +420,16 @@ async def generate_images(
             detail=str(e)
         )
 
+@app.on_event("shutdown")
+async def flush_publishes():
+    """Wait for queued publishes before the worker exits."""
+    await service.flush()
+
+@app.on_event("shutdown")
+async def close_http_client():
+    """Close pooled HTTP connections on shutdown."""
+    await service.http_client.aclose()
+
 @app.get("/health")
 async def health_check() -> Dict[str, Any]:
     """Health check endpoint."""
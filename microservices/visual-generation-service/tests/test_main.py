@@ -1,9 +1,10 @@
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 import json
 import os
-from main import app, VisualGenerationService
+import struct
+from main import app, VisualGenerationService, ImageRequest
 
 # Create test client
 client = TestClient(app)
@@ -38,11 +39,19 @@ def mock_config():
         }
     }
 
+def make_service(config):
+    """Build a service with the given config and no real clients."""
+    def load_config(self):
+        self.config = config
+        return config
+
+    with patch.object(VisualGenerationService, '_load_config', load_config):
+        with patch.object(VisualGenerationService, '_initialize_clients'):
+            return VisualGenerationService()
+
 @pytest.fixture
 def mock_service(mock_config):
-    with patch.object(VisualGenerationService, '_load_config', return_value=mock_config):
-        with patch.object(VisualGenerationService, '_initialize_clients'):
-            yield VisualGenerationService()
+    return make_service(mock_config)
 
 def test_health_check():
     """Test health check endpoint."""
@@ -101,9 +110,9 @@ async def test_generate_images_replicate(mock_service):
     mock_service.replicate_client = MagicMock()
     mock_service.replicate_client.run.return_value = ["https://replicate.com/test-image.png"]
     
-    # Mock image saving
-    mock_service._save_image = MagicMock()
-    mock_service._save_image.return_value = "https://storage.googleapis.com/test-bucket/test-image.png"
+    # Mock streaming the image into storage
+    mock_service._transfer_image = AsyncMock()
+    mock_service._transfer_image.return_value = "https://storage.googleapis.com/test-bucket/test-image.png"
     
     # Mock Pub/Sub publishing
     mock_service.publish_result = MagicMock()
@@ -127,6 +136,67 @@ async def test_generate_images_replicate(mock_service):
     assert result['images'][0]['metadata']['prompt'] == request_data['prompt']
     assert result['images'][0]['metadata']['model'] == 'replicate'
 
+def make_stream_blob():
+    """Build a fake blob whose open() returns a mock upload writer."""
+    blob = MagicMock()
+    blob.public_url = "https://storage.googleapis.com/test-bucket/test-image.png"
+    return blob, blob.open.return_value
+
+@pytest.mark.asyncio
+async def test_save_image_stream(mock_service):
+    """Test streamed chunks are written in order and the upload is finalized."""
+    blob, writer = make_stream_blob()
+    mock_service._new_image_blob = MagicMock(return_value=blob)
+
+    async def chunks():
+        yield b"first"
+        yield b"second"
+
+    assert await mock_service._save_image_stream(chunks()) == blob.public_url
+    assert blob.open.call_args.args == ('wb',)
+    assert [call.args[0] for call in writer.write.call_args_list] == [b"first", b"second"]
+    writer.close.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_save_image_stream_failure_not_finalized(mock_service):
+    """Test a failed download leaves the upload unfinalized."""
+    blob, writer = make_stream_blob()
+    mock_service._new_image_blob = MagicMock(return_value=blob)
+
+    async def chunks():
+        yield b"first"
+        raise ConnectionError("download interrupted")
+
+    with pytest.raises(ConnectionError):
+        await mock_service._save_image_stream(chunks())
+    writer.write.assert_called_once_with(b"first")
+    writer.close.assert_not_called()
+
+def make_png_header(width, height):
+    """Build the PNG signature and IHDR chunk for the given size."""
+    ihdr = struct.pack('>II', width, height) + b'\x08\x02\x00\x00\x00'
+    return b'\x89PNG\r\n\x1a\n' + struct.pack('>I', len(ihdr)) + b'IHDR' + ihdr
+
+@pytest.mark.asyncio
+async def test_check_image_quality_png_header(mock_service, mock_config):
+    """Test PNG dimensions are checked from the IHDR header alone."""
+    assert await mock_service._check_image_quality(make_png_header(1024, 768))
+    assert not await mock_service._check_image_quality(make_png_header(256, 256))
+
+@pytest.mark.asyncio
+async def test_generate_images_cached(mock_config):
+    """Test repeated requests are served from the image cache."""
+    mock_config['cache'] = {'enabled': True, 'ttl_seconds': 60, 'max_entries': 8}
+    service = make_service(mock_config)
+
+    images = [{'url': 'https://storage.googleapis.com/test-bucket/test-image.png', 'metadata': {}}]
+    service._generate_with_stability = AsyncMock(return_value=images)
+    request = ImageRequest(prompt="a beautiful sunset")
+
+    assert await service.generate_images(request) == images
+    assert await service.generate_images(request) == images
+    service._generate_with_stability.assert_awaited_once()
+
 def test_invalid_request():
     """Test invalid request handling."""
     # Test missing prompt